@@ -0,0 +1,224 @@
+# Batch runner: banyak game headless paralel di process pool, tiap run
+# dengan seed & parameter sendiri (lihat space.GAME_PARAMS). Hasil tiap run
+# di-stream (JSON lines) begitu selesai, ringkasan per set parameter di akhir.
+#
+#   python batch_space.py --seeds 20 --param enemy_cap=5,8 --param laser_delay=3000,5000
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+import statistics
+import multiprocessing
+
+os.environ["SPACE_HEADLESS"] = "1"
+
+import pygame
+import space
+
+
+# --- Policy (state -> FrameInput) ---
+
+def idle_policy(state, rng):
+    return space.NO_INPUT
+
+
+def random_policy(state, rng):
+    pressed = [k for k in space.REPLAY_KEYS if rng.random() < 0.25]
+    return space.FrameInput(space.KeyState(pressed), fire=1 if rng.random() < 0.2 else 0)
+
+
+def scripted_policy(state, rng):
+    # kejar musuh terdekat secara horizontal, hindari laser & musuh yang
+    # sudah dekat, tembak tiap 6 frame
+    player = state.player.rect
+    target = None
+    best = None
+    for e in state.enemies:
+        if e.rect.bottom < 0:
+            continue
+        d = abs(e.rect.centerx - player.centerx)
+        if best is None or d < best:
+            best, target = d, e.rect
+
+    pressed = []
+    danger = None
+    for laser in state.boss_lasers:
+        if abs(laser.rect.centerx - player.centerx) < 90:
+            danger = laser.rect.centerx
+    for e in state.enemies:
+        if 0 < player.top - e.rect.bottom < 160 and abs(e.rect.centerx - player.centerx) < 80:
+            danger = e.rect.centerx
+
+    if danger is not None:
+        pressed.append(pygame.K_LEFT if danger >= player.centerx else pygame.K_RIGHT)
+    elif target is not None and best > 8:
+        pressed.append(pygame.K_LEFT if target.centerx < player.centerx else pygame.K_RIGHT)
+    if player.bottom < space.SCREEN_HEIGHT - 10:
+        pressed.append(pygame.K_DOWN)
+
+    return space.FrameInput(space.KeyState(pressed), fire=1 if state.frame % 6 == 0 else 0)
+
+
+POLICIES = {
+    "idle": idle_policy,
+    "random": random_policy,
+    "scripted": scripted_policy,
+}
+
+
+# --- Worker ---
+
+_images = None
+
+
+def _init_worker():
+    global _images
+    pygame.display.set_mode((space.SCREEN_WIDTH, space.SCREEN_HEIGHT))
+    _images = space.load_images()
+
+
+def run_game(job):
+    run_id, seed, params, policy_name, max_frames = job
+    policy = POLICIES[policy_name]
+    rng = random.Random(seed ^ 0x5EED)
+
+    start = time.perf_counter()
+    state = space.GameState(_images, seed=seed, params=params)
+    while state.frame < max_frames and not state.game_over:
+        state.step(policy(state, rng))
+
+    return {
+        "run": run_id,
+        "seed": seed,
+        "policy": policy_name,
+        "params": params,
+        "frames": state.frame,
+        "survival_s": round(state.frame / space.FPS, 2),
+        "score": state.score,
+        "bosses_killed": state.boss_stage - 1,
+        "game_over": state.game_over,
+        "damage": dict(state.damage_taken),
+        "wall_s": round(time.perf_counter() - start, 3),
+    }
+
+
+# --- Ringkasan ---
+
+def summarize(results):
+    groups = {}
+    for r in results:
+        key = json.dumps({"policy": r["policy"], "params": r["params"]}, sort_keys=True)
+        groups.setdefault(key, []).append(r)
+
+    summary = []
+    for key, runs in groups.items():
+        survival = [r["survival_s"] for r in runs]
+        score = [r["score"] for r in runs]
+        bosses = [r["bosses_killed"] for r in runs]
+        damage = {}
+        for r in runs:
+            for src, v in r["damage"].items():
+                damage[src] = damage.get(src, 0) + v
+        summary.append(dict(json.loads(key), **{
+            "runs": len(runs),
+            "survival_mean_s": round(statistics.mean(survival), 2),
+            "survival_median_s": round(statistics.median(survival), 2),
+            "score_mean": round(statistics.mean(score), 1),
+            "score_max": max(score),
+            "bosses_mean": round(statistics.mean(bosses), 2),
+            "bosses_max": max(bosses),
+            "deaths": sum(1 for r in runs if r["game_over"]),
+            "damage_mean": {src: round(v / len(runs), 1) for src, v in damage.items()},
+        }))
+    return summary
+
+
+def _parse_value(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def build_jobs(param_specs, seeds, base_seed, policies, max_frames):
+    # --param name=v1,v2 -> produk kartesius semua set parameter
+    names = []
+    values = []
+    for spec in param_specs:
+        name, _, vals = spec.partition("=")
+        if name not in space.GAME_PARAMS:
+            raise SystemExit(f"parameter tidak dikenal: {name} (pilih dari {', '.join(space.GAME_PARAMS)})")
+        names.append(name)
+        values.append([_parse_value(v) for v in vals.split(",")])
+
+    jobs = []
+    run_id = 0
+    for combo in itertools.product(*values):
+        params = dict(zip(names, combo))
+        for policy in policies:
+            for i in range(seeds):
+                jobs.append((run_id, base_seed + i, params, policy, max_frames))
+                run_id += 1
+    return jobs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Jalankan banyak game headless secara paralel")
+    parser.add_argument("--seeds", type=int, default=8, help="jumlah seed per set parameter")
+    parser.add_argument("--base-seed", type=int, default=1)
+    parser.add_argument("--param", action="append", default=[],
+                        help="name=v1,v2,... (bisa diulang), lihat GAME_PARAMS di space.py")
+    parser.add_argument("--policy", action="append", choices=sorted(POLICIES),
+                        help="bisa diulang, default scripted")
+    parser.add_argument("--max-frames", type=int, default=space.FPS * 60 * 5)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", help="file JSON lines untuk hasil per run (default stdout)")
+    parser.add_argument("--summary", help="tulis ringkasan per set parameter ke file JSON")
+    args = parser.parse_args(argv)
+
+    jobs = build_jobs(args.param, args.seeds, args.base_seed,
+                      args.policy or ["scripted"], args.max_frames)
+    out = open(args.output, "w") if args.output else sys.stdout
+
+    results = []
+    start = time.perf_counter()
+    # spawn, bukan fork: proses induk sudah pygame.init() (thread SDL)
+    ctx = multiprocessing.get_context("spawn")
+    pool = ctx.Pool(args.workers, initializer=_init_worker)
+    try:
+        # chunksize kecil supaya hasil mengalir begitu run selesai
+        for res in pool.imap_unordered(run_game, jobs, chunksize=1):
+            results.append(res)
+            out.write(json.dumps(res) + "\n")
+            out.flush()
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    elapsed = time.perf_counter() - start
+
+    if out is not sys.stdout:
+        out.close()
+
+    summary = summarize(results)
+    frames = sum(r["frames"] for r in results)
+    print(f"\n{len(results)} run, {frames} frame dalam {elapsed:.1f}s "
+          f"({frames / max(elapsed, 1e-9):.0f} frame/s, {args.workers} worker)", file=sys.stderr)
+    for s in summary:
+        print(f"{s['policy']:8s} {json.dumps(s['params'])}: survival {s['survival_mean_s']:.1f}s "
+              f"score {s['score_mean']:.0f} boss {s['bosses_mean']:.2f} damage {s['damage_mean']}",
+              file=sys.stderr)
+
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
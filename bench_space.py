@@ -0,0 +1,260 @@
+# Benchmark headless untuk space.py: skenario dengan seed tetap, hasil
+# p50/p95/p99 frame time + sprites per detik ke JSON, bisa dibandingkan
+# dengan baseline dan gagal (exit 1) kalau lebih lambat dari threshold.
+#
+#   python bench_space.py --output hasil.json
+#   python bench_space.py --baseline baseline.json --threshold 0.15
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+
+os.environ["SPACE_HEADLESS"] = "1"
+
+import numpy as np
+import pygame
+import space
+
+
+def _fire_policy(state):
+    # gerak kiri-kanan sambil menembak tiap 4 frame
+    direction = pygame.K_LEFT if (state.frame // 40) % 2 else pygame.K_RIGHT
+    return space.FrameInput(space.KeyState([direction]), fire=1 if state.frame % 4 == 0 else 0)
+
+
+def _idle_policy(state):
+    direction = pygame.K_LEFT if (state.frame // 40) % 2 else pygame.K_RIGHT
+    return space.FrameInput(space.KeyState([direction]))
+
+
+# --- Skenario ---
+# setup(state) dipanggil sekali, hook(state) tiap frame sebelum step
+
+def steady_setup(state):
+    pass
+
+
+def steady_hook(state):
+    pass
+
+
+def bullets_setup(state):
+    state.player.spread_mode = True
+
+
+def bullets_hook(state):
+    state.player.spread_mode = True
+    state.player.spread_timer = 300
+    # jaga supaya selalu ada 500 peluru di layar
+    for _ in range(500 - len(state.bullets)):
+        b = space.Bullet.spawn(random.randint(0, space.SCREEN_WIDTH),
+                               random.randint(0, space.SCREEN_HEIGHT),
+                               random.choice((-3, 0, 3)))
+        state.register(b, state.all_sprites, state.bullets)
+
+
+def boss_setup(state):
+    state.score = state.boss_stage * 300
+
+
+def boss_hook(state):
+    if state.boss is not None:
+        state.boss.hp = state.boss.max_hp
+    # laser langsung aktif lagi begitu padam
+    if state.boss_spawned and not state.laser_active:
+        state.laser_last -= state.laser_delay
+
+
+def explosions_setup(state):
+    pass
+
+
+def explosions_hook(state):
+    if not state.explosions:
+        for _ in range(20):
+            state.add_explosion(random.randint(0, space.SCREEN_WIDTH),
+                                random.randint(0, space.SCREEN_HEIGHT))
+
+
+def projectiles_hook(state):
+    # jaga ~3000 peluru boss di layar (burst radial dari titik acak)
+    while state.projectiles.count < 3000:
+        state.projectiles.radial(random.randint(100, space.SCREEN_WIDTH - 100),
+                                 random.randint(100, space.SCREEN_HEIGHT - 100),
+                                 60, random.uniform(1.0, 3.0), offset=random.random())
+
+
+def boss_explosion_hook(state):
+    if not state.explosions:
+        state.add_explosion(space.SCREEN_WIDTH // 2, space.SCREEN_HEIGHT // 3, boss=True)
+
+
+SCENARIOS = {
+    "steady": (steady_setup, steady_hook, _idle_policy),
+    "bullets_500": (bullets_setup, bullets_hook, _fire_policy),
+    "boss_laser": (boss_setup, boss_hook, _fire_policy),
+    "explosions_20": (explosions_setup, explosions_hook, _idle_policy),
+    "boss_explosion": (explosions_setup, boss_explosion_hook, _idle_policy),
+    "projectiles_3000": (steady_setup, projectiles_hook, _idle_policy),
+}
+
+
+def run_scenario(name, frames, warmup, seed, draw=True, pixel_collision=False, snapshots=False):
+    setup, hook, policy = SCENARIOS[name]
+    random.seed(seed)
+    screen = pygame.display.get_surface()
+    font = space.TEXT.sysfont(None, 36)
+
+    state = space.GameState(space.load_images(), seed=seed, pixel_collision=pixel_collision)
+    setup(state)
+    # snapshot diambil dari state, di-restore ke state lain (hash harus sama)
+    shadow = space.GameState(state.images, seed=seed, pixel_collision=pixel_collision) if snapshots else None
+    rewind = space.RewindBuffer(seconds=frames / space.FPS)
+
+    times = []
+    snap_times = []
+    restore_times = []
+    snap_bytes = 0
+    sprites = 0
+    particles = 0
+    for i in range(warmup + frames):
+        # benchmark tidak boleh berhenti karena game over
+        state.player.hp = state.player.max_hp
+        hook(state)
+
+        start = time.perf_counter()
+        state.step(policy(state))
+        if draw:
+            state.draw(screen, font, 0)
+        elapsed = time.perf_counter() - start
+
+        if i >= warmup:
+            times.append(elapsed)
+            sprites += len(state.all_sprites) + len(state.boss_lasers) + state.projectiles.count
+            particles += state.particles.count
+
+        if shadow is not None and i >= warmup:
+            start = time.perf_counter()
+            rewind.push(state)
+            mid = time.perf_counter()
+            data = rewind.latest()
+            space.restore_state(shadow, data)
+            snap_times.append(mid - start)
+            restore_times.append(time.perf_counter() - mid)
+            snap_bytes += len(data)
+            if space.state_hash(shadow) != space.state_hash(state):
+                raise RuntimeError(f"{name}: restore snapshot frame {state.frame} tidak sama")
+
+    times = np.array(times) * 1000.0
+    total = times.sum() / 1000.0
+    extra = {}
+    if snap_times:
+        snap_us = np.array(snap_times) * 1e6
+        restore_us = np.array(restore_times) * 1e6
+        extra = {
+            "snapshot_us": round(float(snap_us.mean()), 1),
+            "snapshot_p95_us": round(float(np.percentile(snap_us, 95)), 1),
+            "restore_us": round(float(restore_us.mean()), 1),
+            "restore_p95_us": round(float(np.percentile(restore_us, 95)), 1),
+            "snapshot_bytes": round(snap_bytes / frames),
+            # memori RewindBuffer per detik history (1 snapshot per tick)
+            "history_kb_per_s": round(rewind.bytes_per_second / 1024, 1),
+        }
+    return {
+        "frames": frames,
+        "mean_ms": round(float(times.mean()), 4),
+        "p50_ms": round(float(np.percentile(times, 50)), 4),
+        "p95_ms": round(float(np.percentile(times, 95)), 4),
+        "p99_ms": round(float(np.percentile(times, 99)), 4),
+        "max_ms": round(float(times.max()), 4),
+        "sprites_per_sec": round(sprites / total, 1),
+        "particles_per_sec": round(particles / total, 1),
+        "avg_sprites": round(sprites / frames, 1),
+        **extra,
+    }
+
+
+def compare(results, baseline, metric, threshold):
+    # return list skenario yang lebih lambat dari baseline * (1 + threshold)
+    regressions = []
+    for name, res in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base or metric not in base:
+            continue
+        ratio = res[metric] / base[metric] if base[metric] else 1.0
+        res["baseline_" + metric] = base[metric]
+        res["ratio"] = round(ratio, 3)
+        if ratio > 1.0 + threshold:
+            regressions.append((name, base[metric], res[metric], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark frame time space.py (headless)")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--warmup", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="bisa diulang, default semua skenario")
+    parser.add_argument("--no-draw", action="store_true", help="ukur simulasi saja")
+    parser.add_argument("--pixel-collision", action="store_true", help="collision per piksel (mask)")
+    parser.add_argument("--snapshots", action="store_true",
+                        help="ukur juga biaya snapshot/restore state (rewind) per frame")
+    parser.add_argument("--output", help="tulis hasil ke file JSON")
+    parser.add_argument("--baseline", help="file JSON hasil run sebelumnya")
+    parser.add_argument("--metric", default="p95_ms",
+                        choices=["mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="batas regresi relatif (0.10 = 10%% lebih lambat)")
+    args = parser.parse_args(argv)
+
+    pygame.display.set_mode((space.SCREEN_WIDTH, space.SCREEN_HEIGHT))
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "frames": args.frames,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "draw": not args.no_draw,
+            "pixel_collision": args.pixel_collision,
+            "snapshots": args.snapshots,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "scenarios": {},
+    }
+
+    for name in args.scenario or list(SCENARIOS):
+        res = run_scenario(name, args.frames, args.warmup, args.seed, draw=not args.no_draw,
+                           pixel_collision=args.pixel_collision, snapshots=args.snapshots)
+        results["scenarios"][name] = res
+        print(f"{name:16s} p50 {res['p50_ms']:7.3f} ms  p95 {res['p95_ms']:7.3f} ms  "
+              f"p99 {res['p99_ms']:7.3f} ms  {res['sprites_per_sec']:10.0f} sprites/s")
+        if args.snapshots:
+            print(f"{'':16s} snapshot {res['snapshot_us']:7.1f} us  restore {res['restore_us']:7.1f} us  "
+                  f"{res['snapshot_bytes']:7d} B  {res['history_kb_per_s']:8.1f} KB/s history")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.metric, args.threshold)
+        for name, base, now, ratio in regressions:
+            print(f"REGRESI {name}: {args.metric} {base:.3f} -> {now:.3f} ms (x{ratio:.2f})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    pygame.quit()
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
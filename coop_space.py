@@ -0,0 +1,719 @@
+# Co-op lokal: server authoritative headless menjalankan GameState
+# (num_players=2) pada tick tetap, client tipis hanya mengirim input dan
+# menggambar snapshot. Snapshot entity dikirim lewat UDP sebagai delta
+# terhadap snapshot terakhir yang sudah di-ack client (zlib), client
+# menginterpolasi posisi antar snapshot.
+#
+#   python coop_space.py server --port 5555 --players 2
+#   python coop_space.py client --host 192.168.1.10 --port 5555
+#   python coop_space.py loopback --frames 1800 --loss 0.05   (test tanpa jaringan)
+import os
+import sys
+import time
+import zlib
+import heapq
+import random
+import socket
+import struct
+import argparse
+from collections import OrderedDict
+
+if sys.argv[1:2] in (["server"], ["loopback"]):
+    os.environ["SPACE_HEADLESS"] = "1"
+
+import numpy as np
+import pygame
+import space
+
+# --- Protocol ---
+
+PROTOCOL_MAGIC = b"SPCO"
+PROTOCOL_VERSION = 2             # 2: INPUT punya nomor urut
+
+MSG_JOIN = 1
+MSG_WELCOME = 2
+MSG_INPUT = 3
+MSG_SNAPSHOT = 4
+
+JOIN = struct.Struct("<B4sB")                 # type, magic, version
+WELCOME = struct.Struct("<BBQBB")             # type, slot, seed, players, snapshot_every
+INPUT = struct.Struct("<BBIIBB")              # type, slot, seq, ack tick, key bits, fire total (mod 256)
+SNAPSHOT = struct.Struct("<BIIIHB")           # type, tick, base tick (0 = full), score, boss_stage, flags
+DELTA_COUNTS = struct.Struct("<IIII")         # removed, added, changed, projectiles
+
+FLAG_GAME_OVER = 1
+
+# kind entity di snapshot (index = kode 1 byte)
+NET_KINDS = ("player", "enemy", "boss", "bullet", "item_spread", "item_heal", "laser")
+NET_KIND_CODE = {kind: i for i, kind in enumerate(NET_KINDS)}
+
+# satu record per entity, posisi = center rect. a/b tergantung kind:
+# player: hp, slot | boss: hp, max_hp | lainnya 0
+ENTITY = np.dtype([("id", "<u4"), ("kind", "u1"), ("x", "<i2"), ("y", "<i2"), ("a", "<i2"), ("b", "<i2")])
+FIELDS = ("x", "y", "a", "b")
+DELTA = np.dtype([(f, "<i2") for f in FIELDS])
+EMPTY = np.zeros(0, dtype=ENTITY)
+NO_SHOTS = np.zeros((0, 2), dtype="<i2")
+
+
+def encode_keys(frame_input):
+    # hanya bit tombol arah (bit 0-3), fire dikirim sebagai total kumulatif
+    return space.encode_input(space.FrameInput(frame_input.keys)) & 0x0F
+
+
+# --- Snapshot ---
+
+class Snapshot:
+    __slots__ = ("tick", "score", "boss_stage", "flags", "entities", "shots")
+
+    def __init__(self, tick, score, boss_stage, flags, entities, shots):
+        self.tick = tick
+        self.score = score
+        self.boss_stage = boss_stage
+        self.flags = flags
+        self.entities = entities      # ENTITY array, urut id
+        self.shots = shots            # (n, 2) int16 posisi peluru boss
+
+    def same_as(self, other):
+        return (self.score == other.score and self.boss_stage == other.boss_stage
+                and self.flags == other.flags and np.array_equal(self.entities, other.entities)
+                and np.array_equal(self.shots, other.shots))
+
+
+class SnapshotCapture:
+    # Ambil state GameState jadi Snapshot. Id jaringan stabil selama sprite
+    # hidup; sprite dari pool yang dipakai ulang (generation naik) dapat id baru
+    # supaya client tidak menginterpolasi musuh lama ke posisi musuh baru.
+    def __init__(self):
+        self.ids = {}
+        self.next_id = 1
+
+    def capture(self, state):
+        prev = self.ids
+        ids = self.ids = {}
+        rows = []
+        groups = (
+            [p for p in state.players if p.hp > 0],
+            state.enemies, state.bullets, state.items, state.boss_lasers,
+        )
+        slots = {p: i for i, p in enumerate(state.players)}
+        for group in groups:
+            for s in group:
+                gen = getattr(s, "generation", 0)
+                hit = prev.get(s)
+                if hit is not None and hit[0] == gen:
+                    nid = hit[1]
+                else:
+                    nid = self.next_id
+                    self.next_id += 1
+                ids[s] = (gen, nid)
+                if s.KIND == "player":
+                    a, b = s.hp, slots[s]
+                elif s.KIND == "boss":
+                    a, b = s.hp, s.max_hp
+                else:
+                    a = b = 0
+                rows.append((nid, NET_KIND_CODE[s.KIND], s.rect.centerx, s.rect.centery, a, b))
+        entities = np.array(rows, dtype=ENTITY)
+        entities.sort(order="id")
+
+        proj = state.projectiles
+        shots = np.empty((proj.count, 2), dtype="<i2")
+        shots[:, 0] = proj.x[:proj.count]
+        shots[:, 1] = proj.y[:proj.count]
+        flags = FLAG_GAME_OVER if state.game_over else 0
+        return Snapshot(state.frame, state.score, state.boss_stage, flags, entities, shots)
+
+
+def encode_snapshot(snap, base=None):
+    # delta terhadap base (snapshot yang sudah di-ack client), None -> full.
+    # entity hilang -> id saja, entity baru -> record penuh, entity yang
+    # berubah -> id + selisih field int16 (kecil, mudah dikompres zlib)
+    cur = snap.entities
+    old = base.entities if base is not None else EMPTY
+    in_old = np.isin(cur["id"], old["id"], assume_unique=True)
+    in_cur = np.isin(old["id"], cur["id"], assume_unique=True)
+    added = cur[~in_old]
+    removed = old["id"][~in_cur]
+    common = cur[in_old]
+    prev = old[in_cur]             # sama-sama urut id -> sejajar dengan common
+
+    delta = np.empty(len(common), dtype=DELTA)
+    changed = np.zeros(len(common), dtype=bool)
+    for f in FIELDS:
+        delta[f] = common[f] - prev[f]
+        changed |= delta[f] != 0
+
+    body = b"".join((
+        DELTA_COUNTS.pack(len(removed), len(added), int(changed.sum()), len(snap.shots)),
+        removed.astype("<u4").tobytes(),
+        added.tobytes(),
+        common["id"][changed].astype("<u4").tobytes(),
+        delta[changed].tobytes(),
+        snap.shots.tobytes(),
+    ))
+    header = SNAPSHOT.pack(MSG_SNAPSHOT, snap.tick, base.tick if base is not None else 0,
+                           snap.score, snap.boss_stage, snap.flags)
+    return header + zlib.compress(body, 6)
+
+
+def decode_snapshot(data, bases):
+    # bases: dict tick -> Snapshot yang dimiliki client. None kalau base hilang
+    _, tick, base_tick, score, boss_stage, flags = SNAPSHOT.unpack_from(data)
+    if base_tick and base_tick not in bases:
+        return None
+    old = bases[base_tick].entities if base_tick else EMPTY
+    body = zlib.decompress(data[SNAPSHOT.size:])
+    n_removed, n_added, n_changed, n_shots = DELTA_COUNTS.unpack_from(body)
+    pos = DELTA_COUNTS.size
+
+    def take(dtype, n):
+        nonlocal pos
+        arr = np.frombuffer(body, dtype=dtype, count=n, offset=pos)
+        pos += arr.nbytes
+        return arr
+
+    removed = take("<u4", n_removed)
+    added = take(ENTITY, n_added)
+    changed_ids = take("<u4", n_changed)
+    delta = take(DELTA, n_changed)
+    shots = take("<i2", n_shots * 2).reshape(n_shots, 2).copy()
+
+    kept = old[~np.isin(old["id"], removed, assume_unique=True)].copy()
+    idx = np.searchsorted(kept["id"], changed_ids)
+    for f in FIELDS:
+        kept[f][idx] += delta[f]
+    entities = np.concatenate((kept, added))
+    entities.sort(order="id")
+    return Snapshot(tick, score, boss_stage, flags, entities, shots)
+
+
+# --- Transport ---
+
+class UdpTransport:
+    def __init__(self, bind=("0.0.0.0", 0)):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(bind)
+        self.sock.setblocking(False)
+        self.address = self.sock.getsockname()
+
+    def sendto(self, data, addr):
+        try:
+            self.sock.sendto(data, addr)
+        except (BlockingIOError, ConnectionRefusedError):
+            pass        # UDP: paket boleh hilang
+
+    def recv(self):
+        packets = []
+        while True:
+            try:
+                packets.append(self.sock.recvfrom(65535))
+            except (BlockingIOError, ConnectionResetError):
+                return packets
+
+    def close(self):
+        self.sock.close()
+
+
+class LoopbackNetwork:
+    # Pengganti UDP untuk test: paket antar endpoint di memori, dengan
+    # loss, latency dan jitter (dalam tick) yang bisa diatur; jitter membuat
+    # paket datang tidak urut. deliver() tiap tick.
+    def __init__(self, loss=0.0, latency=0, seed=0, jitter=0):
+        self.loss = loss
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.now = 0
+        self.seq = 0
+        self.in_flight = []           # heap (tick tiba, urutan kirim, ...)
+        self.endpoints = {}
+        self.sent = 0
+        self.dropped = 0
+
+    def endpoint(self, name):
+        ep = self.endpoints[name] = LoopbackEndpoint(self, name)
+        return ep
+
+    def send(self, src, data, dst):
+        self.sent += 1
+        if self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        due = self.now + self.latency + (self.rng.randint(0, self.jitter) if self.jitter else 0)
+        heapq.heappush(self.in_flight, (due, self.seq, src, bytes(data), dst))
+        self.seq += 1
+
+    def deliver(self):
+        self.now += 1
+        while self.in_flight and self.in_flight[0][0] <= self.now:
+            _, _, src, data, dst = heapq.heappop(self.in_flight)
+            if dst in self.endpoints:
+                self.endpoints[dst].inbox.append((data, src))
+
+
+class LoopbackEndpoint:
+    def __init__(self, network, name):
+        self.network = network
+        self.address = name
+        self.inbox = []
+
+    def sendto(self, data, addr):
+        self.network.send(self.address, data, addr)
+
+    def recv(self):
+        packets, self.inbox = self.inbox, []
+        return packets
+
+    def close(self):
+        self.network.endpoints.pop(self.address, None)
+
+
+# --- Server ---
+
+class ClientSlot:
+    __slots__ = ("slot", "addr", "seq", "ack", "keys", "fire_total", "fire_applied", "last_seen")
+
+    def __init__(self, slot, addr):
+        self.slot = slot
+        self.addr = addr
+        self.seq = 0          # nomor urut INPUT terakhir yang dipakai
+        self.ack = 0
+        self.keys = 0
+        self.fire_total = 0
+        self.fire_applied = 0
+        self.last_seen = 0
+
+
+class CoopServer:
+    # Simulasi authoritative. Input client: tombol yang ditahan + total tekan
+    # SPACE (kumulatif, jadi paket input yang hilang tidak menghilangkan
+    # tembakan). Snapshot dibuat sekali per kirim, delta di-encode sekali
+    # per base tick yang berbeda, bukan per client.
+    HISTORY = 64
+
+    def __init__(self, transport, images, num_players=2, seed=None, snapshot_every=2, params=None):
+        self.transport = transport
+        self.num_players = num_players
+        self.snapshot_every = snapshot_every
+        self.state = space.GameState(images, seed=seed, params=params, num_players=num_players)
+        self.capture = SnapshotCapture()
+        self.history = OrderedDict()      # tick -> Snapshot
+        self.clients = {}                 # addr -> ClientSlot
+        self.bytes_sent = 0
+        self.snapshots_sent = 0
+        self.full_sent = 0
+        self.encode_time = 0.0
+        self.sim_time = 0.0
+        self.fires = 0                    # tekan SPACE yang dijalankan simulasi
+
+    @property
+    def ready(self):
+        return len(self.clients) >= self.num_players
+
+    def poll(self):
+        for data, addr in self.transport.recv():
+            if not data:
+                continue
+            kind = data[0]
+            if kind == MSG_JOIN and len(data) >= JOIN.size:
+                _, magic, version = JOIN.unpack_from(data)
+                if magic != PROTOCOL_MAGIC or version != PROTOCOL_VERSION:
+                    continue
+                client = self.clients.get(addr)
+                if client is None:
+                    if len(self.clients) >= self.num_players:
+                        continue
+                    client = self.clients[addr] = ClientSlot(len(self.clients), addr)
+                # WELCOME diulang kalau JOIN diulang (paket bisa hilang)
+                self.transport.sendto(WELCOME.pack(MSG_WELCOME, client.slot, self.state.seed,
+                                                   self.num_players, self.snapshot_every), addr)
+            elif kind == MSG_INPUT and len(data) >= INPUT.size:
+                client = self.clients.get(addr)
+                if client is None:
+                    continue
+                _, _, seq, ack, keys, fire_total = INPUT.unpack_from(data)
+                client.last_seen = self.state.frame
+                # paket bisa datang tidak urut: yang lebih tua dari input
+                # terakhir dibuang (fire_total lama = tembakan palsu)
+                if seq <= client.seq:
+                    continue
+                client.seq = seq
+                client.ack = max(client.ack, ack)
+                client.keys = keys
+                client.fire_total = fire_total
+
+    def _inputs(self):
+        inputs = [space.NO_INPUT] * self.num_players
+        for client in self.clients.values():
+            fire = (client.fire_total - client.fire_applied) % 256
+            if fire > 128:
+                fire = 0      # mundur (tidak mungkin kalau seq benar), jangan jadi 15 tembakan
+            client.fire_applied = client.fire_total
+            self.fires += min(fire, 15)
+            inputs[client.slot] = space.FrameInput(space.decode_input(client.keys).keys, min(fire, 15))
+        return inputs
+
+    def tick(self):
+        start = time.perf_counter()
+        self.state.step(*self._inputs())
+        self.sim_time += time.perf_counter() - start
+        if self.state.frame % self.snapshot_every == 0 or self.state.game_over:
+            self.send_snapshots()
+
+    def send_snapshots(self):
+        start = time.perf_counter()
+        snap = self.capture.capture(self.state)
+        self.history[snap.tick] = snap
+        while len(self.history) > self.HISTORY:
+            self.history.popitem(last=False)
+
+        encoded = {}
+        for client in self.clients.values():
+            base = self.history.get(client.ack)
+            key = base.tick if base is not None else 0
+            data = encoded.get(key)
+            if data is None:
+                data = encoded[key] = encode_snapshot(snap, base)
+            if base is None:
+                self.full_sent += 1
+            self.transport.sendto(data, client.addr)
+            self.bytes_sent += len(data)
+            self.snapshots_sent += 1
+        self.encode_time += time.perf_counter() - start
+
+    def run(self, max_frames=None):
+        # loop real-time: tunggu semua player join, lalu tick tiap 1/FPS
+        print(f"server menunggu {self.num_players} player di {self.transport.address}", file=sys.stderr)
+        while not self.ready:
+            self.poll()
+            time.sleep(0.01)
+        print("semua player masuk, mulai", file=sys.stderr)
+        step = 1.0 / space.FPS
+        next_tick = time.perf_counter()
+        while not self.state.game_over and (max_frames is None or self.state.frame < max_frames):
+            self.poll()
+            self.tick()
+            next_tick += step
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.perf_counter()
+        # snapshot terakhir (game over) diulang beberapa kali, bisa hilang
+        for _ in range(5):
+            self.send_snapshots()
+            time.sleep(0.05)
+
+    def stats(self):
+        frames = max(self.state.frame, 1)
+        return {
+            "frames": self.state.frame,
+            "score": self.state.score,
+            "snapshots": self.snapshots_sent,
+            "full_snapshots": self.full_sent,
+            "bytes_per_snapshot": round(self.bytes_sent / max(self.snapshots_sent, 1), 1),
+            "kbps_per_client": round(self.bytes_sent * 8 / 1000 / max(len(self.clients), 1)
+                                     / (frames / space.FPS), 1),
+            "sim_ms_per_tick": round(self.sim_time * 1000 / frames, 3),
+            "net_ms_per_tick": round(self.encode_time * 1000 / frames, 3),
+        }
+
+
+# --- Client ---
+
+class CoopClient:
+    # Kirim input tiap frame, terima snapshot, dan sediakan view yang
+    # diinterpolasi `interp` tick di belakang snapshot terbaru.
+    KEEP = 32
+
+    def __init__(self, transport, server, interp=None):
+        self.transport = transport
+        self.server = server
+        self.slot = None
+        self.seed = None
+        self.snapshot_every = 2
+        self.interp = interp
+        self.snapshots = OrderedDict()    # tick -> Snapshot
+        self.latest = None
+        self.fire_total = 0
+        self.fires = 0
+        self.input_seq = 0
+        self.render_tick = None
+        self.received = 0
+        self.undecodable = 0
+
+    @property
+    def joined(self):
+        return self.slot is not None
+
+    def join(self):
+        self.transport.sendto(JOIN.pack(MSG_JOIN, PROTOCOL_MAGIC, PROTOCOL_VERSION), self.server)
+
+    def send_input(self, frame_input):
+        if not self.joined:
+            return
+        self.fire_total = (self.fire_total + frame_input.fire) % 256
+        self.fires += frame_input.fire
+        ack = self.latest.tick if self.latest is not None else 0
+        self.input_seq += 1
+        self.transport.sendto(INPUT.pack(MSG_INPUT, self.slot, self.input_seq, ack,
+                                         encode_keys(frame_input), self.fire_total), self.server)
+
+    def poll(self):
+        for data, addr in self.transport.recv():
+            if addr != self.server or not data:
+                continue
+            if data[0] == MSG_WELCOME and len(data) >= WELCOME.size:
+                _, slot, seed, _, every = WELCOME.unpack_from(data)
+                self.slot, self.seed, self.snapshot_every = slot, seed, every
+                if self.interp is None:
+                    self.interp = every * 2
+            elif data[0] == MSG_SNAPSHOT and self.joined:
+                tick = SNAPSHOT.unpack_from(data)[1]
+                if self.latest is not None and tick <= self.latest.tick:
+                    continue          # terlambat / duplikat
+                snap = decode_snapshot(data, self.snapshots)
+                if snap is None:
+                    self.undecodable += 1
+                    continue
+                self.received += 1
+                self.snapshots[tick] = snap
+                self.latest = snap
+                while len(self.snapshots) > self.KEEP:
+                    self.snapshots.popitem(last=False)
+
+    def advance(self):
+        # waktu render maju 1 tick per frame, dijaga dalam jendela interpolasi
+        if self.latest is None:
+            return
+        target = self.latest.tick - self.interp
+        if self.render_tick is None or abs(self.render_tick - target) > self.interp:
+            self.render_tick = float(target)
+        else:
+            self.render_tick += 1.0
+            # koreksi pelan ke target supaya tidak jauh tertinggal/mendahului
+            self.render_tick += (target - self.render_tick) * 0.05
+
+    def view(self):
+        # return (Snapshot dasar, entity dengan posisi terinterpolasi)
+        if self.latest is None:
+            return None, EMPTY
+        ticks = list(self.snapshots)
+        t = self.render_tick if self.render_tick is not None else self.latest.tick
+        older = newer = None
+        for tick in ticks:
+            if tick <= t:
+                older = self.snapshots[tick]
+            elif newer is None:
+                newer = self.snapshots[tick]
+        if older is None:
+            # render_tick lebih tua dari semua snapshot: tahan di yang tertua
+            older = self.snapshots[ticks[0]]
+            return older, older.entities
+        if newer is None:
+            return older, older.entities
+        frac = (t - older.tick) / (newer.tick - older.tick)
+        ents = older.entities.copy()
+        both = np.isin(ents["id"], newer.entities["id"], assume_unique=True)
+        idx = np.searchsorted(newer.entities["id"], ents["id"][both])
+        for f in ("x", "y"):
+            a = ents[f][both].astype(np.float32)
+            b = newer.entities[f][idx].astype(np.float32)
+            ents[f][both] = np.round(a + (b - a) * frac).astype(np.int16)
+        return older, ents
+
+
+class SnapshotRenderer:
+    # Gambar view client pakai image yang sama dengan game lokal
+    def __init__(self, images):
+        laser = pygame.Surface((8, space.SCREEN_HEIGHT), pygame.SRCALPHA)
+        laser.fill((255, 80, 0))
+        player = space.SPRITES.scaled("player", images["player"], (80, 80))
+        self.players = [space.tint_image(player, c) if i else player
+                        for i, c in enumerate(space.PLAYER_TINTS)]
+        self.images = {
+            "enemy": space.SPRITES.scaled("enemy", images["enemy"], (70, 70)),
+            "boss": space.SPRITES.scaled("boss", images["boss"], (200, 200)),
+            "bullet": space.SPRITES.get("bullet", (8, 8), space.make_bullet_image),
+            "item_spread": space.SPRITES.get("item", (20, 20), space.make_item_image),
+            "item_heal": space.SPRITES.get("heal", (26, 26), space.make_heal_image),
+            "laser": laser,
+        }
+        self.bg = images["bg_game"]
+        self.shot = space.SPRITES.get("enemy_shot", (10, 10), space.make_enemy_shot_image)
+        self.font = space.TEXT.sysfont(None, 36)
+
+    def draw(self, screen, snap, entities, slot):
+        screen.blit(self.bg, (0, 0))
+        if snap is None:
+            text = space.TEXT.render(self.font, "Menunggu server...", space.WHITE)
+            screen.blit(text, text.get_rect(center=screen.get_rect().center))
+            return
+        blits = []
+        hud = []
+        for e in entities.tolist():
+            _, kind, x, y, a, b = e
+            name = NET_KINDS[kind]
+            if name == "player":
+                img = self.players[b % len(self.players)]
+                hud.append((b, a))
+            else:
+                img = self.images[name]
+            w, h = img.get_size()
+            blits.append((img, (x - w // 2, y - h // 2)))
+            if name == "boss":
+                fill = int(150 * a / max(b, 1))
+                pygame.draw.rect(screen, (60, 60, 60), (x - 75, y - h // 2 - 20, 150, 10))
+                pygame.draw.rect(screen, (255, 0, 0), (x - 75, y - h // 2 - 20, fill, 10))
+        screen.blits(blits, doreturn=False)
+        r = self.shot.get_width() // 2
+        screen.blits([(self.shot, (x - r, y - r)) for x, y in snap.shots.tolist()], doreturn=False)
+
+        score = space.TEXT.render(self.font, f"Score: {snap.score}", space.WHITE)
+        screen.blit(score, (10, 40))
+        small = space.TEXT.sysfont(None, 24)
+        for i, (player_slot, hp) in enumerate(sorted(hud)):
+            me = " (kamu)" if player_slot == slot else ""
+            text = space.TEXT.render(small, f"P{player_slot + 1} HP {hp}{me}", space.WHITE)
+            screen.blit(text, (10, 80 + i * 22))
+        if snap.flags & FLAG_GAME_OVER:
+            over = space.TEXT.render(self.font, "GAME OVER", space.WHITE)
+            screen.blit(over, over.get_rect(center=screen.get_rect().center))
+
+
+# --- Mode ---
+
+def run_server(args):
+    pygame.display.set_mode((space.SCREEN_WIDTH, space.SCREEN_HEIGHT))
+    transport = UdpTransport((args.host, args.port))
+    server = CoopServer(transport, space.load_images(), num_players=args.players,
+                        seed=args.seed, snapshot_every=args.snapshot_every)
+    try:
+        server.run(args.frames)
+    finally:
+        transport.close()
+    print(server.stats(), file=sys.stderr)
+    return 0
+
+
+def run_client(args):
+    screen = pygame.display.set_mode((space.SCREEN_WIDTH, space.SCREEN_HEIGHT))
+    pygame.display.set_caption("Space Shooter - Co-op")
+    transport = UdpTransport()
+    client = CoopClient(transport, (socket.gethostbyname(args.host), args.port))
+    renderer = SnapshotRenderer(space.load_images())
+    clock = pygame.time.Clock()
+    last_join = 0
+    running = True
+    while running:
+        clock.tick(space.FPS)
+        events = pygame.event.get()
+        for event in events:
+            if event.type == pygame.QUIT:
+                running = False
+        if not client.joined and time.monotonic() - last_join > 0.5:
+            client.join()
+            last_join = time.monotonic()
+        client.send_input(space.read_frame_input(events))
+        client.poll()
+        client.advance()
+        snap, entities = client.view()
+        renderer.draw(screen, snap, entities, client.slot)
+        pygame.display.flip()
+    transport.close()
+    pygame.quit()
+    return 0
+
+
+def run_loopback(args):
+    # server + N client bot dalam satu proses lewat LoopbackNetwork; cek
+    # snapshot hasil decode client identik dengan snapshot server
+    pygame.display.set_mode((space.SCREEN_WIDTH, space.SCREEN_HEIGHT))
+    net = LoopbackNetwork(loss=args.loss, latency=args.latency, seed=args.seed or 0,
+                          jitter=args.jitter)
+    server = CoopServer(net.endpoint("server"), space.load_images(), num_players=args.players,
+                        seed=args.seed, snapshot_every=args.snapshot_every)
+    clients = [CoopClient(net.endpoint(f"client{i}"), "server") for i in range(args.players)]
+    rngs = [random.Random(i) for i in range(args.players)]
+
+    while not server.ready:
+        for c in clients:
+            if not c.joined:
+                c.join()
+        net.deliver()
+        server.poll()
+        net.deliver()
+        for c in clients:
+            c.poll()
+
+    mismatches = 0
+    checked = 0
+    while server.state.frame < args.frames and not server.state.game_over:
+        for c, rng in zip(clients, rngs):
+            pressed = [k for k in space.REPLAY_KEYS if rng.random() < 0.3]
+            c.send_input(space.FrameInput(space.KeyState(pressed), fire=1 if rng.random() < 0.15 else 0))
+        net.deliver()
+        server.poll()
+        server.tick()
+        net.deliver()
+        for c in clients:
+            c.poll()
+            c.advance()
+            c.view()
+            latest = c.latest
+            if latest is not None and latest.tick in server.history:
+                checked += 1
+                if not latest.same_as(server.history[latest.tick]):
+                    mismatches += 1
+
+    stats = server.stats()
+    full = len(encode_snapshot(server.history[next(reversed(server.history))]))
+    stats.update({
+        "full_snapshot_bytes": full,
+        "packets": net.sent,
+        "dropped": net.dropped,
+        "client_snapshots": [c.received for c in clients],
+        "undecodable": [c.undecodable for c in clients],
+        "checked": checked,
+        "mismatches": mismatches,
+        # tembakan di server tidak boleh lebih dari yang ditekan client
+        "fires": f"{server.fires} / {sum(c.fires for c in clients)}",
+    })
+    for k, v in stats.items():
+        print(f"{k:20s} {v}")
+    phantom = server.fires > sum(c.fires for c in clients)
+    return 1 if mismatches or phantom else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Space Shooter co-op (server authoritative, UDP)")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    p = sub.add_parser("server")
+    p.add_argument("--host", default="0.0.0.0")
+    p.add_argument("--port", type=int, default=5555)
+    p.add_argument("--players", type=int, default=2)
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--frames", type=int, default=None, help="berhenti setelah N tick")
+    p.add_argument("--snapshot-every", type=int, default=2, help="kirim snapshot tiap N tick")
+
+    p = sub.add_parser("client")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=5555)
+
+    p = sub.add_parser("loopback")
+    p.add_argument("--players", type=int, default=2)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--frames", type=int, default=1800)
+    p.add_argument("--snapshot-every", type=int, default=2)
+    p.add_argument("--loss", type=float, default=0.05, help="peluang paket hilang")
+    p.add_argument("--latency", type=int, default=3, help="latency satu arah dalam tick")
+    p.add_argument("--jitter", type=int, default=2, help="tambahan latency acak 0..N tick (paket tidak urut)")
+
+    args = parser.parse_args(argv)
+    return {"server": run_server, "client": run_client, "loopback": run_loopback}[args.mode](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
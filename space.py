@@ -1,9 +1,24 @@
 import pygame
+import numpy as np
 import random
 import sys
 import time
 import math
 import os
+import csv
+import json
+import argparse
+import struct
+import zlib
+import heapq
+import queue
+import atexit
+import sqlite3
+import threading
+import concurrent.futures
+from array import array
+from collections import OrderedDict, deque
+from itertools import repeat
 
 GAME_MUSIC_LIST = [
     "BGmusik.mp3",
@@ -11,60 +26,710 @@ GAME_MUSIC_LIST = [
     "BGmusik3.mp3"
 ]
 
-current_music_index = 0
+# --- Mode headless (tanpa window & audio, untuk test/benchmark) ---
+# harus di-set sebelum pygame.init() supaya SDL pakai driver dummy
+HEADLESS = "--headless" in sys.argv or os.environ.get("SPACE_HEADLESS") == "1"
+if HEADLESS:
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    # biar SIGINT/SIGTERM tetap menghentikan proses (batch runner, Ctrl-C)
+    os.environ["SDL_NO_SIGNAL_HANDLERS"] = "1"
 
 # --- Konfigurasi awal ---
 pygame.init()
+if HEADLESS:
+    pygame.mixer.quit()
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 FPS = 60
+STEP_MS = 1000.0 / FPS     # durasi satu tick simulasi
+MAX_CATCHUP = 5            # maks step per frame kalau frame lambat (anti spiral)
+MENU_FPS = 30              # batas frame animasi menu
+MENU_IDLE_MS = 500         # menu diam: tidur di event.wait paling lama segini
 
 # Warna
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
+YELLOW = (255, 255, 0)
 
 camera_shake_timer = 0
 
+# Parameter balancing GameState (bisa di-override per game, mis. batch runner)
+GAME_PARAMS = {
+    "boss_base_hp": 80,          # HP boss stage 1
+    "boss_hp_per_stage": 25,     # tambahan HP boss tiap stage
+    "boss_score_step": 300,      # boss muncul tiap kelipatan skor ini
+    "item_interval": 400,        # frame antar item spread
+    "heal_chance": 1000,         # peluang heal 1/N per frame
+    "enemy_cap": 5,              # maksimal musuh kecil di layar
+    "enemy_interval": 60,        # frame antar spawn musuh
+    "laser_delay": 5000,         # ms antar laser boss
+    "laser_duration": 1500,      # ms laser aktif
+    "boss_pattern_interval": 90, # frame per pola tembakan boss
+    "projectile_speed": 4,       # px/frame peluru boss
+    "projectile_damage": 10,     # damage per kena peluru boss
+}
+
 def resource_path(relative_path):
     if hasattr(sys, "_MEIPASS"):
         return os.path.join(sys._MEIPASS, relative_path)
     return relative_path
 
-# --- Helper highscore ---
-def load_highscore():
+# === LEADERBOARD ===
+
+def load_highscore(path="highscore.txt"):
+    # format lama (satu angka), hanya dipakai untuk migrasi ke leaderboard
     try:
-        with open("highscore.txt", "r") as f:
+        with open(path, "r") as f:
             return int(f.read())
-    except:
+    except (OSError, ValueError):
         return 0
 
-def save_highscore(score):
-    try:
-        with open("highscore.txt", "w") as f:
-            f.write(str(score))
-    except:
-        pass
+
+class Leaderboard:
+    # Skor disimpan di SQLite (transaksi atomik, WAL) dengan index pada score
+    # sehingga query top-N murah. Semua I/O jalan di satu thread writer;
+    # main thread hanya membaca cache top-N di memori (tidak pernah blocking).
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS scores (
+            id INTEGER PRIMARY KEY,
+            score INTEGER NOT NULL,
+            boss_stage INTEGER NOT NULL,
+            duration_s REAL NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC, id);
+    """
+
+    def __init__(self, path="leaderboard.db", top_n=10, legacy_path="highscore.txt"):
+        self.path = path
+        self.top_n = top_n
+        self.legacy_path = legacy_path
+        self.entries = []           # top-N terurut, dict score/boss_stage/duration_s/created_at
+        self.error = None
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="leaderboard", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # --- main thread ---
+
+    def best(self):
+        with self._lock:
+            return self.entries[0]["score"] if self.entries else 0
+
+    def top(self, n=None):
+        with self._lock:
+            return list(self.entries[:n or self.top_n])
+
+    def submit(self, score, boss_stage=1, duration_s=0.0):
+        # cache langsung di-update, penulisan ke disk di thread writer
+        entry = {"score": int(score), "boss_stage": int(boss_stage),
+                 "duration_s": round(float(duration_s), 2), "created_at": time.time()}
+        with self._lock:
+            self._insert(entry)
+        self._queue.put(entry)
+        return entry
+
+    def close(self, timeout=2.0):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _insert(self, entry):
+        # entry baru kalah dari entry lama dengan skor sama
+        i = len(self.entries)
+        while i > 0 and self.entries[i - 1]["score"] < entry["score"]:
+            i -= 1
+        self.entries.insert(i, entry)
+        del self.entries[self.top_n:]
+
+    # --- thread writer ---
+
+    def _run(self):
+        try:
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._migrate(conn)
+            rows = conn.execute(
+                "SELECT score, boss_stage, duration_s, created_at FROM scores "
+                "ORDER BY score DESC, id LIMIT ?", (self.top_n,)).fetchall()
+        except sqlite3.Error as e:
+            self._fail(e)
+            self.ready.set()
+            self._drain()
+            return
+
+        loaded = [dict(zip(("score", "boss_stage", "duration_s", "created_at"), r)) for r in rows]
+        with self._lock:
+            # skor yang di-submit sebelum load selesai tetap dipertahankan
+            pending = self.entries
+            self.entries = loaded
+            for entry in pending:
+                self._insert(entry)
+        self.ready.set()
+
+        while True:
+            entry = self._queue.get()
+            batch = [entry]
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            rows = [(e["score"], e["boss_stage"], e["duration_s"], e["created_at"])
+                    for e in batch if e is not None]
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO scores (score, boss_stage, duration_s, created_at) "
+                        "VALUES (?, ?, ?, ?)", rows)
+            except sqlite3.Error as e:
+                self._fail(e)
+            if None in batch:
+                break
+        conn.close()
+
+    def _fail(self, e):
+        # error pertama dilaporkan sekali ke stderr; skor tetap ada di cache memori
+        if self.error is None:
+            print(f"leaderboard: {self.path}: {e} (skor tidak disimpan)", file=sys.stderr)
+        self.error = e
+
+    def _drain(self):
+        # database tidak bisa dibuka: tetap kosongkan queue supaya close() tidak menunggu
+        while self._queue.get() is not None:
+            pass
+
+    def _migrate(self, conn):
+        if conn.execute("SELECT 1 FROM scores LIMIT 1").fetchone():
+            return
+        legacy = load_highscore(self.legacy_path)
+        if legacy > 0:
+            with conn:
+                conn.execute("INSERT INTO scores (score, boss_stage, duration_s, created_at) "
+                             "VALUES (?, 1, 0, ?)", (legacy, time.time()))
+
+# === PARTICLES ===
+
+class ParticleSystem:
+    # Semua partikel ledakan disimpan sebagai structure-of-arrays NumPy,
+    # di-update dan di-cull sekaligus per frame (bukan dict per partikel).
+    LAYER_FLASH = 0
+    LAYER_DEBRIS = 1
+    LAYER_SMOKE = 2
+
+    ALPHA_STEP = 16          # kuantisasi alpha untuk cache sprite lingkaran
+    MAX_CACHED_SPRITES = 512
+
+    def __init__(self, capacity=256):
+        self.count = 0
+        # diatur QualityGovernor: fraksi partikel yang di-emit, smoke on/off
+        self.detail = 1.0
+        self.smoke = True
+        self.sprite_cache = {}
+        self.scratch = None
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old = self.count
+        arrays = {
+            "x": np.float32, "y": np.float32,
+            "vx": np.float32, "vy": np.float32,
+            "alpha": np.float32, "dalpha": np.float32,
+            "size": np.float32, "dsize": np.float32, "size_max": np.float32,
+            "life": np.int32, "layer": np.int8, "color": np.uint32,
+        }
+        for name, dtype in arrays.items():
+            buf = np.zeros(capacity, dtype=dtype)
+            if old:
+                buf[:old] = getattr(self, name)[:old]
+            setattr(self, name, buf)
+        self.capacity = capacity
+
+    def emit(self, x, y, vx, vy, alpha, dalpha, size, dsize, color, life, layer,
+             size_max=np.inf):
+        # semua argumen boleh skalar atau array sepanjang n (di-broadcast)
+        n = max(np.size(v) for v in (x, y, vx, vy, size))
+        if self.count + n > self.capacity:
+            self._allocate(max(self.capacity * 2, self.count + n))
+        s = slice(self.count, self.count + n)
+        self.x[s] = x
+        self.y[s] = y
+        self.vx[s] = vx
+        self.vy[s] = vy
+        self.alpha[s] = alpha
+        self.dalpha[s] = dalpha
+        self.size[s] = size
+        self.dsize[s] = dsize
+        self.size_max[s] = size_max
+        self.life[s] = life
+        self.layer[s] = layer
+        self.color[s] = (color[0] << 16) | (color[1] << 8) | color[2]
+        self.count += n
+
+    def update(self):
+        n = self.count
+        if not n:
+            return
+        self.x[:n] += self.vx[:n]
+        self.y[:n] += self.vy[:n]
+        self.alpha[:n] += self.dalpha[:n]
+        np.minimum(self.size[:n] + self.dsize[:n], self.size_max[:n], out=self.size[:n])
+        self.life[:n] -= 1
+
+        # cull partikel mati (umur habis / sudah transparan), compact ke depan
+        alive = (self.life[:n] > 0) & (self.alpha[:n] > 0)
+        if not alive.all():
+            keep = np.flatnonzero(alive)
+            m = len(keep)
+            for name in ("x", "y", "vx", "vy", "alpha", "dalpha", "size", "dsize",
+                         "size_max", "life", "layer", "color"):
+                buf = getattr(self, name)
+                buf[:m] = buf[keep]
+            self.count = m
+
+    def clear(self):
+        self.count = 0
+
+    def _circle(self, key):
+        surf = self.sprite_cache.get(key)
+        if surf is None:
+            if len(self.sprite_cache) >= self.MAX_CACHED_SPRITES:
+                self.sprite_cache.clear()
+            color, radius, alpha = key
+            surf = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(
+                surf,
+                ((color >> 16) & 255, (color >> 8) & 255, color & 255, alpha),
+                (radius, radius),
+                radius
+            )
+            self.sprite_cache[key] = surf
+        return surf
+
+    def draw(self, screen, scale=1.0):
+        # return list bounding box area yang digambar (untuk dirty-rect);
+        # scale != 1 untuk render target yang resolusinya beda dari logika
+        n = self.count
+        if not n:
+            return []
+        radius = (self.size[:n] * scale).astype(np.int32)
+        visible = radius >= 1
+        rects = []
+        # urutan gambar: flash -> debris -> smoke (seperti Explosion lama)
+        layers = (self.LAYER_FLASH, self.LAYER_DEBRIS, self.LAYER_SMOKE)
+        for layer in layers if self.smoke else layers[:2]:
+            idx = np.flatnonzero(visible & (self.layer[:n] == layer))
+            if len(idx):
+                area = self._draw_layer(screen, idx, radius[idx], layer == self.LAYER_SMOKE, scale)
+                if area.width and area.height:
+                    rects.append(area)
+        return rects
+
+    def _draw_layer(self, screen, idx, radius, composite, scale=1.0):
+        alpha = np.clip(self.alpha[idx], 0, 255).astype(np.int32)
+        alpha = np.minimum(alpha // self.ALPHA_STEP * self.ALPHA_STEP + self.ALPHA_STEP // 2, 255)
+        color = self.color[idx].astype(np.int64)
+
+        # satu lookup cache per kombinasi unik (warna, radius, alpha)
+        keys = (color << 20) | (radius.astype(np.int64) << 8) | alpha
+        uniq, inverse = np.unique(keys, return_inverse=True)
+        table = np.empty(len(uniq), dtype=object)
+        for i, k in enumerate(uniq.tolist()):
+            table[i] = self._circle((k >> 20, (k >> 8) & 4095, k & 255))
+        surfs = table[inverse].tolist()
+
+        px = (self.x[idx] * scale).astype(np.int32) - radius
+        py = (self.y[idx] * scale).astype(np.int32) - radius
+        area = pygame.Rect(int(px.min()), int(py.min()), 0, 0)
+        area.width = int((px + radius * 2).max()) - area.x
+        area.height = int((py + radius * 2).max()) - area.y
+        area = area.clip(screen.get_rect())
+        if not composite:
+            screen.blits(zip(surfs, zip(px.tolist(), py.tolist())), doreturn=False)
+            return area
+        if not area.width or not area.height:
+            return area
+
+        # smoke: dulu semua lingkaran ditimpa di satu surface lalu di-blit sekali,
+        # jadi asap yang bertumpuk tidak makin pekat. Ditiru dengan BLEND_RGBA_MAX
+        # di scratch surface, hanya seluas bounding box partikelnya.
+        if self.scratch is None or self.scratch.get_size() != screen.get_size():
+            self.scratch = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
+        self.scratch.fill((0, 0, 0, 0), area)
+        self.scratch.blits(
+            [(s, p, None, pygame.BLEND_RGBA_MAX) for s, p in zip(surfs, zip(px.tolist(), py.tolist()))],
+            doreturn=False
+        )
+        screen.blit(self.scratch, area.topleft, area)
+        return area
+
+
+# dipakai Explosion kalau tidak diberi ParticleSystem sendiri
+PARTICLES = ParticleSystem()
+
+
+# === PROJECTILES ===
+
+class ProjectileSystem:
+    # Peluru musuh/boss sebagai structure-of-arrays NumPy: gerak, cull di
+    # luar layar dan tes kena hitbox player dilakukan sekaligus per frame,
+    # digambar dengan satu Surface.blits dari satu image bersama.
+    RADIUS = 5
+    MARGIN = 20
+
+    def __init__(self, capacity=1024):
+        self.count = 0
+        self.emitted = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old = self.count
+        arrays = {}
+        for name in ("x", "y", "vx", "vy"):
+            arr = np.zeros(capacity, dtype=np.float32)
+            if old:
+                arr[:old] = getattr(self, name)[:old]
+            arrays[name] = arr
+        self.__dict__.update(arrays)
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count
+
+    def emit(self, x, y, vx, vy):
+        n = max(np.size(v) for v in (x, y, vx, vy))
+        if self.count + n > self.capacity:
+            self._allocate(max(self.capacity * 2, self.count + n))
+        s = slice(self.count, self.count + n)
+        self.x[s] = x
+        self.y[s] = y
+        self.vx[s] = vx
+        self.vy[s] = vy
+        self.count += n
+        self.emitted += n
+
+    # --- Pola ---
+
+    def radial(self, x, y, n, speed, offset=0.0):
+        # n peluru menyebar rata 360 derajat; offset yang berputar -> spiral
+        angle = offset + np.arange(n, dtype=np.float32) * np.float32(2 * math.pi / n)
+        self.emit(x, y, speed * np.cos(angle), speed * np.sin(angle))
+
+    def fan(self, x, y, target_x, target_y, n, spread, speed):
+        # n peluru selebar `spread` radian, tengahnya mengarah ke target
+        aim = math.atan2(target_y - y, target_x - x)
+        angle = aim + np.linspace(-spread / 2, spread / 2, n, dtype=np.float32)
+        self.emit(x, y, speed * np.cos(angle), speed * np.sin(angle))
+
+    def update(self):
+        n = self.count
+        if not n:
+            return
+        x, y = self.x[:n], self.y[:n]
+        x += self.vx[:n]
+        y += self.vy[:n]
+        m = self.MARGIN
+        alive = (x > -m) & (x < SCREEN_WIDTH + m) & (y > -m) & (y < SCREEN_HEIGHT + m)
+        if not alive.all():
+            self._compact(alive)
+
+    def _compact(self, keep):
+        idx = np.flatnonzero(keep)
+        k = len(idx)
+        for arr in (self.x, self.y, self.vx, self.vy):
+            arr[:k] = arr[idx]
+        self.count = k
+
+    def collide_rect(self, rect, remove=True):
+        # jumlah peluru (lingkaran RADIUS) yang menyentuh rect, sekaligus
+        n = self.count
+        if not n:
+            return 0
+        x, y = self.x[:n], self.y[:n]
+        dx = x - np.clip(x, rect.left, rect.right)
+        dy = y - np.clip(y, rect.top, rect.bottom)
+        hit = dx * dx + dy * dy <= self.RADIUS * self.RADIUS
+        count = int(np.count_nonzero(hit))
+        if count and remove:
+            self._compact(~hit)
+        return count
+
+    def clear(self):
+        self.count = 0
+
+    def draw(self, screen, scale=1.0):
+        # return list bounding box area yang digambar (untuk dirty-rect)
+        n = self.count
+        if not n:
+            return []
+        img = SPRITES.get("enemy_shot", (self.RADIUS * 2, self.RADIUS * 2), make_enemy_shot_image)
+        if scale != 1:
+            img = scaled_image(img, scale)
+        r = img.get_width() // 2
+        px = (self.x[:n] * scale).astype(np.int32) - r
+        py = (self.y[:n] * scale).astype(np.int32) - r
+        screen.blits(zip(repeat(img), zip(px.tolist(), py.tolist())), doreturn=False)
+        area = pygame.Rect(int(px.min()), int(py.min()), 0, 0)
+        area.width = int(px.max()) + r * 2 - area.x
+        area.height = int(py.max()) + r * 2 - area.y
+        return [area.clip(screen.get_rect())]
+
+
+def make_enemy_shot_image():
+    r = ProjectileSystem.RADIUS
+    img = pygame.Surface((r * 2, r * 2), pygame.SRCALPHA)
+    pygame.draw.circle(img, (255, 60, 120), (r, r), r)
+    pygame.draw.circle(img, (255, 220, 235), (r, r), r // 2)
+    return img
+
+
+# === COLLISION ===
+
+class SpatialHash:
+    # Broadphase grid seragam untuk satu sprite group. refresh() dipanggil
+    # sekali per frame setelah sprite bergerak; hanya sprite yang pindah sel
+    # yang di-rehash. Hasil query sama dengan pygame.sprite.spritecollide /
+    # groupcollide (urutan group, flag dokill).
+    def __init__(self, group, cell_size=64):
+        self.group = group
+        self.cell_size = cell_size
+        self.cells = {}       # (cx, cy) -> set of sprites
+        self.bounds = {}      # sprite -> (x0, y0, x1, y1) sel yang ditempati
+        self.order = {}       # sprite -> urutan masuk group (untuk urutan hasil)
+        self.next_order = 0
+
+    def _cell_bounds(self, rect):
+        cs = self.cell_size
+        return (rect.left // cs, rect.top // cs,
+                (rect.right - 1) // cs, (rect.bottom - 1) // cs)
+
+    def _insert(self, sprite, b):
+        cells = self.cells
+        for cx in range(b[0], b[2] + 1):
+            for cy in range(b[1], b[3] + 1):
+                cell = cells.get((cx, cy))
+                if cell is None:
+                    cells[(cx, cy)] = cell = set()
+                cell.add(sprite)
+
+    def _remove(self, sprite, b):
+        cells = self.cells
+        for cx in range(b[0], b[2] + 1):
+            for cy in range(b[1], b[3] + 1):
+                cell = cells.get((cx, cy))
+                if cell is not None:
+                    cell.discard(sprite)
+                    if not cell:
+                        del cells[(cx, cy)]
+
+    def clear(self):
+        # mulai dari kosong (mis. setelah restore snapshot), diisi ulang di refresh()
+        self.cells.clear()
+        self.bounds.clear()
+        self.order.clear()
+        self.next_order = 0
+
+    def discard(self, sprite):
+        b = self.bounds.pop(sprite, None)
+        if b is not None:
+            self._remove(sprite, b)
+            del self.order[sprite]
+
+    def refresh(self):
+        bounds = self.bounds
+        members = self.group.spritedict
+
+        # buang sprite yang sudah keluar dari group
+        if len(bounds) > len(members) or any(s not in members for s in bounds):
+            for s in [s for s in bounds if s not in members]:
+                self.discard(s)
+
+        for s in members:
+            b = self._cell_bounds(s.rect)
+            old = bounds.get(s)
+            if old == b:
+                continue
+            if old is None:
+                self.order[s] = self.next_order
+                self.next_order += 1
+            else:
+                self._remove(s, old)
+            self._insert(s, b)
+            bounds[s] = b
+
+    def candidates(self, rect):
+        x0, y0, x1, y1 = self._cell_bounds(rect)
+        cells = self.cells
+        found = set()
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells.get((cx, cy))
+                if cell:
+                    found |= cell
+        return found
+
+    def spritecollide(self, sprite, dokill, collided=None):
+        rect = sprite.rect
+        members = self.group.spritedict
+        hits = [s for s in self.candidates(rect)
+                if s in members and rect.colliderect(s.rect)
+                and (collided is None or collided(sprite, s))]
+        hits.sort(key=self.order.__getitem__)
+        if dokill:
+            for s in hits:
+                self.discard(s)
+                s.kill()
+        return hits
+
+    def groupcollide(self, groupa, dokilla, dokillb, collided=None):
+        # seperti pygame.sprite.groupcollide(groupa, self.group, ...)
+        crashed = {}
+        for a in groupa.sprites():
+            c = self.spritecollide(a, dokillb, collided)
+            if c:
+                crashed[a] = c
+                if dokilla:
+                    a.kill()
+        return crashed
+
+
+# --- Pixel-accurate collision (opsional) ---
+
+_masks = {}
+
+
+def sprite_mask(sprite):
+    # mask dibuat sekali per image (varian scale/blink sudah image sendiri
+    # yang di-cache), bukan tiap frame seperti pygame.sprite.collide_mask
+    img = getattr(sprite, "mask_image", None)
+    if img is None:
+        img = sprite.image
+    hit = _masks.get(id(img))
+    if hit is None or hit[0] is not img:
+        if len(_masks) > 512:
+            _masks.clear()
+        hit = _masks[id(img)] = (img, pygame.mask.from_surface(img))
+    return hit[1]
+
+
+def collide_mask_cached(a, b):
+    # collided= untuk SpatialHash: dipanggil hanya untuk pasangan yang rect-nya
+    # sudah pasti overlap, jadi overlap mask hanya untuk beberapa pasangan
+    offset = (b.rect.x - a.rect.x, b.rect.y - a.rect.y)
+    return sprite_mask(a).overlap(sprite_mask(b), offset) is not None
+
 
 # === CLASSES ===
 
-class Explosion(pygame.sprite.Sprite):
-    def __init__(self, x, y, boss=False):
+# --- Sprite image cache & object pool ---
+
+class SpriteCache:
+    # image sprite dibuat sekali per (kind, size) lalu dipakai bersama
+    def __init__(self):
+        self.images = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind, size, factory):
+        key = (kind, size)
+        img = self.images.get(key)
+        if img is None:
+            self.misses += 1
+            img = factory()
+            self.images[key] = img
+        else:
+            self.hits += 1
+        return img
+
+    def scaled(self, kind, img, size):
+        return self.get(kind, size, lambda: pygame.transform.scale(img, size))
+
+    def clear(self):
+        self.images.clear()
+
+
+SPRITES = SpriteCache()
+
+
+class PooledSprite(pygame.sprite.DirtySprite):
+    # Sprite yang di-kill masuk ke pool per class, spawn() memakai ulang
+    # objeknya lewat reset() alih-alih membuat sprite baru.
+    pool_limit = 1024
+    generation = 0   # naik tiap dipakai ulang (id entity baru untuk netcode)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._pool = []
+
+    @classmethod
+    def spawn(cls, *args):
+        if cls._pool:
+            obj = cls._pool.pop()
+            obj.reset(*args)
+            obj.generation += 1
+            return obj
+        return cls(*args)
+
+    def kill(self):
+        # hanya sprite yang masih hidup yang dikembalikan (hindari double-release)
+        if self.alive():
+            super().kill()
+            if len(self._pool) < self.pool_limit:
+                self._pool.append(self)
+
+
+class StateImages:
+    # Varian visual (mis. alpha untuk blink) dibuat sekali per image lewat
+    # SPRITES, lalu set_visual_state() cukup menukar referensi self.image.
+    # name -> alpha
+    VISUAL_STATES = {"normal": 255}
+
+    def init_visual_states(self, kind, img):
+        size = img.get_size()
+        # semua varian bentuknya sama, mask collision cukup dari image dasar
+        self.mask_image = img
+        self.state_images = {}
+        for name, alpha in self.VISUAL_STATES.items():
+            if alpha == 255:
+                variant = img
+            else:
+                variant = SPRITES.get(f"{kind}:{name}", size, lambda a=alpha: self._alpha_copy(img, a))
+            self.state_images[name] = variant
+        self.visual_state = "normal"
+        self.image = self.state_images["normal"]
+
+    @staticmethod
+    def _alpha_copy(img, alpha):
+        variant = img.copy()
+        variant.set_alpha(alpha)
+        return variant
+
+    def set_visual_state(self, name):
+        if name != self.visual_state:
+            self.visual_state = name
+            self.image = self.state_images[name]
+
+
+class Explosion(pygame.sprite.DirtySprite):
+    # image kosong, partikelnya digambar oleh ParticleSystem
+    KIND = "explosion"
+
+    def __init__(self, x, y, boss=False, particles=None, rng=None):
         super().__init__()
+        rng = rng or random
         self.x = x
         self.y = y
         self.boss = boss
+        self.particles = particles if particles is not None else PARTICLES
         # Durasi
         self.timer = 40 if boss else 15
-        # Surface size
-        if boss:
-            self.image = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            self.rect = self.image.get_rect()
-        else:
-            self.image = pygame.Surface((80, 80), pygame.SRCALPHA)
-            self.rect = self.image.get_rect(center=(x, y))
+        self.image = SPRITES.get("explosion", (1, 1), lambda: pygame.Surface((1, 1), pygame.SRCALPHA))
+        self.rect = self.image.get_rect(center=(x, y))
 
         # debris
-        self.debris = []
         if boss:
             count = 40
             speed_min, speed_max = 4, 12
@@ -74,87 +739,51 @@ class Explosion(pygame.sprite.Sprite):
             speed_min, speed_max = 2, 5
             size_min, size_max = 2, 3
 
-        for _ in range(count):
-            angle = random.uniform(0, math.pi * 2)
-            speed = random.uniform(speed_min, speed_max)
-            size = random.randint(size_min, size_max)
-            self.debris.append({
-                "x": x,
-                "y": y,
-                "vx": speed * math.cos(angle),
-                "vy": speed * math.sin(angle),
-                "size": size,
-                "alpha": 255
-            })
-
-        # smoke only for boss
-        self.smoke = []
-        if boss:
-            for _ in range(25):
-                self.smoke.append({
-                    "x": x + random.randint(-20, 20),
-                    "y": y + random.randint(-20, 20),
-                    "size": random.randint(20, 60),
-                    "alpha": 200
-                })
-
-        # flash
-        self.flash_radius = 0
-        self.flash_max = 120 if boss else 0
+        angle = np.array([rng.uniform(0, math.pi * 2) for _ in range(count)], dtype=np.float32)
+        speed = np.array([rng.uniform(speed_min, speed_max) for _ in range(count)], dtype=np.float32)
+        size = np.array([rng.randint(size_min, size_max) for _ in range(count)], dtype=np.float32)
+        # rng tetap di-roll penuh supaya simulasi sama di semua level quality,
+        # yang dikurangi hanya partikel yang di-emit
+        keep = max(1, int(count * self.particles.detail))
+        angle, speed, size = angle[:keep], speed[:keep], size[:keep]
+        self.particles.emit(
+            x, y, speed * np.cos(angle), speed * np.sin(angle),
+            alpha=255, dalpha=-8, size=size, dsize=0,
+            color=(255, 140, 0), life=self.timer, layer=ParticleSystem.LAYER_DEBRIS
+        )
 
-        # sound
         if boss:
-            try:
-                snd = pygame.mixer.Sound("boss_explosion.wav")
-                snd.set_volume(0.9)
-                snd.play()
-            except Exception:
-                pass
-
-    def update(self):
-        self.timer -= 1
-        self.image.fill((0, 0, 0, 0))
-
-        # flash
-        if self.boss and self.flash_radius < self.flash_max:
-            self.flash_radius += 6
-            pygame.draw.circle(
-                self.image, (255, 220, 120, 160),
-                (self.x, self.y),
-                self.flash_radius
+            # flash hanya tampil selama membesar (0 -> 120, +6 per frame = 20
+            # frame), bukan selama ledakan. Partikel hilang di update ke-`life`,
+            # jadi +1 supaya frame radius 120 ikut tergambar. Debris & smoke
+            # memang tampil sepanjang ledakan (life=timer, debris habis lebih
+            # dulu lewat alpha).
+            flash_frames = 120 // 6
+            self.particles.emit(
+                x, y, 0, 0, alpha=160, dalpha=0, size=0, dsize=6, size_max=120,
+                color=(255, 220, 120), life=flash_frames + 1, layer=ParticleSystem.LAYER_FLASH
             )
 
-        # debris
-        for d in self.debris:
-            d["x"] += d["vx"]
-            d["y"] += d["vy"]
-            d["alpha"] -= 8
-            if d["alpha"] > 0:
-                pygame.draw.circle(
-                    self.image,
-                    (255, 140, 0, max(d["alpha"], 0)),
-                    (int(d["x"]), int(d["y"])),
-                    d["size"]
-                )
-
-        # smoke
-        if self.boss:
-            for s in self.smoke:
-                s["y"] -= 0.3
-                s["alpha"] -= 2
-                s["size"] += 0.7
-                pygame.draw.circle(
-                    self.image,
-                    (120, 120, 120, max(s["alpha"], 0)),
-                    (int(s["x"]), int(s["y"])),
-                    int(s["size"])
+            # smoke only for boss
+            smoke = [(x + rng.randint(-20, 20), y + rng.randint(-20, 20), rng.randint(20, 60))
+                     for _ in range(25)]
+            sx, sy, ssize = (np.array(v, dtype=np.float32) for v in zip(*smoke))
+            if self.particles.smoke:
+                self.particles.emit(
+                    sx, sy, 0, -0.3, alpha=200, dalpha=-2, size=ssize, dsize=0.7,
+                    color=(120, 120, 120), life=self.timer, layer=ParticleSystem.LAYER_SMOKE
                 )
 
+    def update(self):
+        # gerak partikel dilakukan ParticleSystem.update() sekali per frame
+        self.timer -= 1
         if self.timer <= 0:
             self.kill()
 
 
-class BossLaser(pygame.sprite.Sprite):
+class BossLaser(pygame.sprite.DirtySprite):
+    KIND = "laser"
+
     def __init__(self, boss):
         super().__init__()
         self.boss = boss
@@ -170,12 +799,16 @@ class BossLaser(pygame.sprite.Sprite):
         self.rect.centerx += int((target_x - self.rect.centerx) * self.follow_speed)
 
 
-class Player(pygame.sprite.Sprite):
-    def __init__(self, img):
+class Player(StateImages, pygame.sprite.DirtySprite):
+    # hurt: blink cepat setelah kena hit, low_hp: blink lambat saat HP <= 30%
+    VISUAL_STATES = {"normal": 255, "hurt": 100, "low_hp": 90}
+    KIND = "player"
+
+    def __init__(self, img, variant="player"):
         super().__init__()
-        # store original image for alpha resets
-        self.orig_image = pygame.transform.scale(img, (80, 80))
-        self.image = self.orig_image.copy()
+        # store original image for alpha resets; variant = kunci cache (player2 dst.)
+        self.orig_image = SPRITES.scaled(variant, img, (80, 80))
+        self.init_visual_states(variant, self.orig_image)
         self.rect = self.image.get_rect()
         self.rect.centerx = SCREEN_WIDTH // 2
         self.rect.bottom = SCREEN_HEIGHT - 10
@@ -194,8 +827,11 @@ class Player(pygame.sprite.Sprite):
         self.spread_mode = False
         self.spread_timer = 0
 
+        # input dari GameState.step (None -> baca keyboard langsung)
+        self.controls = None
+
     def update(self):
-        keys = pygame.key.get_pressed()
+        keys = self.controls if self.controls is not None else pygame.key.get_pressed()
         if keys[pygame.K_LEFT] and self.rect.left > 0:
             self.rect.x -= self.speed
         if keys[pygame.K_RIGHT] and self.rect.right < SCREEN_WIDTH:
@@ -233,35 +869,64 @@ class Player(pygame.sprite.Sprite):
         # if invincible -> fast blink (hurt), else if low HP -> slow blink
         if self.invincible > 0:
             if self.invincible % 8 < 4:
-                self.image = self.orig_image.copy()
-                self.image.set_alpha(100)
+                self.set_visual_state("hurt")
             else:
-                self.image = self.orig_image.copy()
-                self.image.set_alpha(255)
+                self.set_visual_state("normal")
         elif self.blink:
-            self.image = self.orig_image.copy()
-            self.image.set_alpha(90)
+            self.set_visual_state("low_hp")
         else:
-            self.image = self.orig_image.copy()
-            self.image.set_alpha(255)
+            self.set_visual_state("normal")
 
     def shoot(self):
         bullets = []
         if self.spread_mode:
-            bullets.append(Bullet(self.rect.centerx, self.rect.top, 0))
-            bullets.append(Bullet(self.rect.centerx, self.rect.top, -3))
-            bullets.append(Bullet(self.rect.centerx, self.rect.top, 3))
+            bullets.append(Bullet.spawn(self.rect.centerx, self.rect.top, 0))
+            bullets.append(Bullet.spawn(self.rect.centerx, self.rect.top, -3))
+            bullets.append(Bullet.spawn(self.rect.centerx, self.rect.top, 3))
         else:
-            bullets.append(Bullet(self.rect.centerx, self.rect.top, 0))
+            bullets.append(Bullet.spawn(self.rect.centerx, self.rect.top, 0))
         return bullets
 
 
-class Bullet(pygame.sprite.Sprite):
+PLAYER_TINTS = ((255, 255, 255), (255, 170, 90), (140, 255, 140), (255, 140, 255))
+
+
+def tint_image(img, color):
+    tinted = img.copy()
+    tinted.fill(color + (255,), special_flags=pygame.BLEND_RGBA_MULT)
+    return tinted
+
+
+def make_bullet_image():
+    img = pygame.Surface((8, 8), pygame.SRCALPHA)
+    pygame.draw.circle(img, (0, 255, 200), (4, 4), 4)
+    return img
+
+
+def make_item_image():
+    img = pygame.Surface((20, 20), pygame.SRCALPHA)
+    pygame.draw.circle(img, (255, 255, 0), (10, 10), 10)
+    return img
+
+
+def make_heal_image():
+    img = pygame.Surface((26, 26), pygame.SRCALPHA)
+    # draw a small heart-like shape or simple green cross
+    pygame.draw.rect(img, (0, 180, 0), (6, 6, 14, 14))
+    pygame.draw.rect(img, (255,255,255), (6,6,14,14), 2)
+    return img
+
+
+class Bullet(PooledSprite):
+    KIND = "bullet"
+
     def __init__(self, x, y, angle):
         super().__init__()
-        self.image = pygame.Surface((8, 8), pygame.SRCALPHA)
-        pygame.draw.circle(self.image, (0, 255, 200), (4, 4), 4)
+        self.image = SPRITES.get("bullet", (8, 8), make_bullet_image)
         self.rect = self.image.get_rect()
+        self.reset(x, y, angle)
+
+    def reset(self, x, y, angle):
         self.rect.centerx = x
         self.rect.bottom = y
         self.speedy = -10
@@ -274,14 +939,21 @@ class Bullet(pygame.sprite.Sprite):
             self.kill()
 
 
-class Enemy(pygame.sprite.Sprite):
-    def __init__(self, img):
+class Enemy(StateImages, PooledSprite):
+    KIND = "enemy"
+
+    def __init__(self, img, rng=None):
         super().__init__()
-        self.image = pygame.transform.scale(img, (70, 70))
+        self.image = SPRITES.scaled("enemy", img, (70, 70))
         self.rect = self.image.get_rect()
-        self.rect.x = random.randint(0, SCREEN_WIDTH - self.rect.width)
-        self.rect.y = random.randint(-150, -50)
-        self.speed = random.randint(2, 5)
+        self.reset(img, rng)
+
+    def reset(self, img, rng=None):
+        rng = rng or random
+        self.init_visual_states("enemy", SPRITES.scaled("enemy", img, (70, 70)))
+        self.rect.x = rng.randint(0, SCREEN_WIDTH - self.rect.width)
+        self.rect.y = rng.randint(-150, -50)
+        self.speed = rng.randint(2, 5)
 
     def update(self):
         self.rect.y += self.speed
@@ -289,15 +961,20 @@ class Enemy(pygame.sprite.Sprite):
             self.kill()
 
 
-class Item(pygame.sprite.Sprite):
+class Item(PooledSprite):
     # existing item (power-up spread)
-    def __init__(self):
+    KIND = "item_spread"
+
+    def __init__(self, rng=None):
         super().__init__()
-        self.image = pygame.Surface((20, 20), pygame.SRCALPHA)
-        pygame.draw.circle(self.image, (255, 255, 0), (10, 10), 10)
+        self.image = SPRITES.get("item", (20, 20), make_item_image)
         self.rect = self.image.get_rect()
-        self.rect.x = random.randint(0, SCREEN_WIDTH - self.rect.width)
-        self.rect.y = random.randint(-200, -40)
+        self.reset(rng)
+
+    def reset(self, rng=None):
+        rng = rng or random
+        self.rect.x = rng.randint(0, SCREEN_WIDTH - self.rect.width)
+        self.rect.y = rng.randint(-200, -40)
         self.speed = 3
 
     def update(self):
@@ -306,16 +983,19 @@ class Item(pygame.sprite.Sprite):
             self.kill()
 
 
-class ItemHeal(pygame.sprite.Sprite):
+class ItemHeal(PooledSprite):
     # heal item +30 HP
-    def __init__(self):
+    KIND = "item_heal"
+
+    def __init__(self, rng=None):
         super().__init__()
-        self.image = pygame.Surface((26, 26), pygame.SRCALPHA)
-        # draw a small heart-like shape or simple green cross
-        pygame.draw.rect(self.image, (0, 180, 0), (6, 6, 14, 14))
-        pygame.draw.rect(self.image, (255,255,255), (6,6,14,14), 2)
+        self.image = SPRITES.get("heal", (26, 26), make_heal_image)
         self.rect = self.image.get_rect()
-        self.rect.x = random.randint(0, SCREEN_WIDTH - self.rect.width)
+        self.reset(rng)
+
+    def reset(self, rng=None):
+        rng = rng or random
+        self.rect.x = rng.randint(0, SCREEN_WIDTH - self.rect.width)
         self.rect.y = -30
         self.speedy = 3
 
@@ -325,10 +1005,12 @@ class ItemHeal(pygame.sprite.Sprite):
             self.kill()
 
 
-class Boss(pygame.sprite.Sprite):
+class Boss(StateImages, pygame.sprite.DirtySprite):
+    KIND = "boss"
+
     def __init__(self, img, hp):
         super().__init__()
-        self.image = pygame.transform.scale(img, (200, 200))
+        self.init_visual_states("boss", SPRITES.scaled("boss", img, (200, 200)))
         self.rect = self.image.get_rect()
         self.rect.centerx = SCREEN_WIDTH // 2
         self.rect.y = -150
@@ -345,12 +1027,64 @@ class Boss(pygame.sprite.Sprite):
             if self.rect.right > SCREEN_WIDTH or self.rect.left < 0:
                 self.direction *= -1
 
+# --- Font registry & text render cache ---
+
+class TextCache:
+    # font dimuat sekali per (name, size); surface teks disimpan LRU per
+    # (font, text, color) sehingga HUD hanya di-render ulang kalau nilainya berubah
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def sysfont(self, name, size):
+        key = ("sys", name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.fonts[key] = pygame.font.SysFont(name, size)
+        return font
+
+    def font(self, path, size):
+        key = ("file", path, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.fonts[key] = pygame.font.Font(path, size)
+        return font
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, color, antialias)
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surf
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        self.surfaces[key] = surf
+        if len(self.surfaces) > self.maxsize:
+            self.surfaces.popitem(last=False)
+        return surf
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses,
+                "cached": len(self.surfaces), "fonts": len(self.fonts)}
+
+
+TEXT = TextCache()
+
+
 # --- UI: draw player HP bar ---
-def draw_player_hp(screen, player):
-    bar_width = 200
-    bar_height = 18
-    x = 10
-    y = 10  # top-left
+def draw_player_hp(screen, player, scale=1.0, slot=0):
+    bar_width = round(200 * scale)
+    bar_height = round(18 * scale)
+    x = round(10 * scale)
+    y = round(10 * scale)  # top-left
+    if slot:
+        # HP player lain di kanan atas, ke bawah per slot
+        x = screen.get_width() - bar_width - round(110 * scale)
+        y = round((10 + (slot - 1) * 26) * scale)
 
     fill = max(0, int(bar_width * (player.hp / player.max_hp)))
     # color based on HP
@@ -365,86 +1099,118 @@ def draw_player_hp(screen, player):
     pygame.draw.rect(screen, (40, 40, 40), (x, y, bar_width, bar_height))
     pygame.draw.rect(screen, color, (x, y, fill, bar_height))
     # border
-    pygame.draw.rect(screen, WHITE, (x, y, bar_width, bar_height), 2)
+    bar_rect = pygame.draw.rect(screen, WHITE, (x, y, bar_width, bar_height), 2)
 
     # numeric
-    font = pygame.font.SysFont(None, 20)
-    txt = font.render(f"HP: {player.hp}/{player.max_hp}", True, WHITE)
-    screen.blit(txt, (x + bar_width + 10, y))
+    font = TEXT.sysfont(None, round(20 * scale))
+    txt = TEXT.render(font, f"HP: {player.hp}/{player.max_hp}", WHITE)
+    return [bar_rect, screen.blit(txt, (x + bar_width + round(10 * scale), y))]
 
 
 # --- Screens ---
 def splash_loading(screen):
-    try:
-        splash_img = pygame.image.load(resource_path("splash.png"))
-        splash_img = pygame.transform.scale(splash_img, (SCREEN_WIDTH, SCREEN_HEIGHT))
-    except:
-        splash_img = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        splash_img.fill((10, 10, 30))
+    # splash sendiri di-load duluan, sisanya paralel selama bar berjalan
+    splash_img = ASSETS.scaled("splash")
+    loader = ASSETS.load_async()
 
     bar_width = 400
     bar_height = 25
     bar_x = (SCREEN_WIDTH - bar_width) // 2
     bar_y = SCREEN_HEIGHT - 80
 
-    for progress in range(0, 101):
+    font = TEXT.font(None, 40)
+    finished = False
+    while not finished:
+        finished = loader.poll(timeout=1 / FPS)
+        pygame.event.pump()
+
+        progress = int(loader.progress * 100)
         screen.blit(splash_img, (0, 0))
         pygame.draw.rect(screen, (50, 50, 50), (bar_x, bar_y, bar_width, bar_height))
         pygame.draw.rect(screen, (0, 255, 0), (bar_x, bar_y, bar_width * (progress / 100), bar_height))
-        font = pygame.font.Font(None, 40)
-        text = font.render(f"Loading {progress}%", True, (255, 255, 255))
+        text = TEXT.render(font, f"Loading {progress}%", (255, 255, 255))
         screen.blit(text, (bar_x + 120, bar_y - 40))
-        pygame.display.update()
-        pygame.time.delay(6)
+        present(screen)
+    return loader
 
 def start_game_music():
-    global current_music_index
+    # maju ke lagu berikutnya (muter terus), load di thread audio
+    AUDIO.next_music()
 
-    pygame.mixer.music.stop()
-    pygame.mixer.music.load(resource_path(GAME_MUSIC_LIST[current_music_index]))
-    pygame.mixer.music.play(-1)
 
-    # maju ke lagu berikutnya (muter terus)
-    current_music_index = (current_music_index + 1) % len(GAME_MUSIC_LIST)
+# Menu event-driven: gambar sekali, lalu tidur di event.wait sampai ada
+# input; layar hanya di-present ulang kalau ada yang berubah.
+MENU_REDRAW_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED)
 
 
-def show_welcome_screen(screen, font, highscore, menu_bg):
-    start_game_music()
-    waiting = True
+def wait_menu_events(timeout=MENU_IDLE_MS):
+    # blok sampai ada event (atau timeout), lalu ambil sisa antrian sekaligus;
+    # [] kalau timeout
+    event = pygame.event.wait(timeout)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
 
-    while waiting:
-        # Gambar background menu (di-scale biar pas layar)
-        bg_scaled = pygame.transform.scale(menu_bg, (SCREEN_WIDTH, SCREEN_HEIGHT))
-        screen.blit(bg_scaled, (0, 0))
 
-        # Tampilkan
-        pygame.display.flip()
+def show_welcome_screen(screen, font, highscore, menu_bg):
+    start_game_music()
+    # background menu sudah di-scale oleh AssetManager, cukup digambar sekali
+    screen.blit(menu_bg, (0, 0))
+    present(screen)
 
-        # Event handler
-        for event in pygame.event.get():
+    while True:
+        for event in wait_menu_events():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
-
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    waiting = False
-
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                return
+            elif event.type in MENU_REDRAW_EVENTS:
+                present(screen)
 
 
 def animate_text_down(screen, text, font, color, target_y, speed=7):
-    y = -150
+    # speed = px per 10 ms (seperti delay lama), frame dibatasi MENU_FPS;
+    # hanya area teks lama + baru yang di-update
     render = font.render(text, True, color)
+    x = SCREEN_WIDTH // 2 - render.get_width() // 2
+    y = -150.0
+    clock = pygame.time.Clock()
+    screen.fill(BLACK)
+    present(screen)
+    old = None
     while y < target_y:
-        screen.fill((0, 0, 0))
-        screen.blit(render, (SCREEN_WIDTH // 2 - render.get_width() // 2, y))
-        pygame.display.update()
-        y += speed
-        pygame.time.delay(10)
-
-
-def show_game_over_screen(screen, font, score, highscore):
+        pygame.event.pump()
+        if old:
+            screen.fill(BLACK, old)
+        new = screen.blit(render, (x, round(y)))
+        present(screen, [new.union(old) if old else new])
+        old = new
+        y += speed * clock.tick(MENU_FPS) / 10
+
+
+def render_leaderboard(entries, current=None):
+    # tabel top-N di-render sekali ke satu surface (bukan tiap frame)
+    small = TEXT.sysfont(None, 26)
+    rows = [TEXT.render(small, "TOP SKOR", YELLOW)]
+    for i, e in enumerate(entries, 1):
+        minutes, seconds = divmod(int(e["duration_s"]), 60)
+        color = YELLOW if e is current else WHITE
+        rows.append(TEXT.render(small, f"{i}. {e['score']:>6}  boss {e['boss_stage']}  "
+                                       f"{minutes}:{seconds:02d}", color))
+    width = max(r.get_width() for r in rows)
+    height = sum(r.get_height() + 4 for r in rows)
+    panel = pygame.Surface((width, height), pygame.SRCALPHA)
+    y = 0
+    for r in rows:
+        panel.blit(r, (0, y))
+        y += r.get_height() + 4
+    return panel
+
+
+def show_game_over_screen(screen, font, score, highscore, leaders=None, current=None):
     big_font = pygame.font.SysFont(None, 90)
+    board = render_leaderboard(leaders, current) if leaders else None
     
     # warna button
     BTN_NORMAL = (80, 80, 80)
@@ -473,354 +1239,2068 @@ def show_game_over_screen(screen, font, score, highscore):
     # animasi tulisan turun
     animate_text_down(screen, "GAME OVER", big_font, WHITE, SCREEN_HEIGHT // 4, speed=8)
 
-    waiting = True
-    while waiting:
-        screen.fill(BLACK)
+    # bagian statis (teks, leaderboard) di-render sekali ke satu surface
+    static = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+    static.fill(BLACK)
+    over = big_font.render("GAME OVER", True, WHITE)
+    skor = font.render(f"Skor Akhir: {score}", True, WHITE)
+    hs_text = font.render(f"High Score: {highscore}", True, WHITE)
+    static.blit(over, (SCREEN_WIDTH // 2 - over.get_width() // 2, SCREEN_HEIGHT // 4))
+    static.blit(skor, (SCREEN_WIDTH // 2 - skor.get_width() // 2, SCREEN_HEIGHT // 2 - 40))
+    static.blit(hs_text, (SCREEN_WIDTH // 2 - hs_text.get_width() // 2, SCREEN_HEIGHT // 2))
+    if board:
+        static.blit(board, (20, SCREEN_HEIGHT // 2 + 60))
+
+    # tiap tombol: image normal & hover dibuat sekali
+    def button_images(rect, label):
+        text = font.render(label, True, BTN_TEXT)
+        images = []
+        for color in (BTN_NORMAL, BTN_HOVER):
+            img = pygame.Surface(rect.size, pygame.SRCALPHA)
+            pygame.draw.rect(img, color, img.get_rect(), border_radius=15)
+            img.blit(text, text.get_rect(center=img.get_rect().center))
+            images.append(img)
+        return images
+
+    buttons = (
+        ("retry", retry_rect, button_images(retry_rect, "MAIN LAGI")),
+        ("quit", quit_rect, button_images(quit_rect, "KELUAR")),
+    )
 
-        # text
-        over = big_font.render("GAME OVER", True, WHITE)
-        skor = font.render(f"Skor Akhir: {score}", True, WHITE)
-        hs_text = font.render(f"High Score: {highscore}", True, WHITE)
+    def hovered(pos):
+        for name, rect, _ in buttons:
+            if rect.collidepoint(pos):
+                return name
+        return None
+
+    # redraw hanya kalau tombol yang di-hover berubah
+    hover = hovered(logical_mouse_pos())
+    redraw = True
+    while True:
+        if redraw:
+            screen.blit(static, (0, 0))
+            for name, rect, images in buttons:
+                screen.blit(images[name == hover], rect)
+            present(screen)
+            redraw = False
+
+        events = wait_menu_events()
+        for event in events:
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                clicked = hovered(DISPLAY.to_logical(event.pos) if DISPLAY is not None else event.pos)
+                if clicked:
+                    return clicked
+            elif event.type in MENU_REDRAW_EVENTS:
+                redraw = True
+        # timeout juga cek ulang posisi mouse (event motion bisa terlewat
+        # saat window tidak fokus)
+        now = hovered(logical_mouse_pos())
+        if now != hover:
+            hover = now
+            redraw = True
+
+
+
+# === ASSETS ===
+
+def _fallback_player():
+    img = pygame.Surface((80, 80), pygame.SRCALPHA)
+    pygame.draw.polygon(img, (0, 150, 255), [(40,0),(0,80),(80,80)])
+    return img
+
+
+def _fallback_fill(size, color):
+    def make():
+        img = pygame.Surface(size)
+        img.fill(color)
+        return img
+    return make
+
+
+class AssetManager:
+    # Semua image & sound dimuat sekali lewat resource_path, image langsung
+    # di-convert ke format display, varian yang di-scale disimpan di SPRITES.
+    # name: (file, punya alpha?, fallback kalau file gagal dimuat)
+    IMAGES = {
+        "player": ("Pesawat.png", True, _fallback_player),
+        "enemy": ("Musuh.png", True, _fallback_fill((70, 70), (200, 50, 50))),
+        "boss": ("Boss.png", True, _fallback_fill((200, 200), (100, 0, 120))),
+        "menu_bg": ("Tekan (3).png", False, _fallback_fill((SCREEN_WIDTH, SCREEN_HEIGHT), (20, 20, 40))),
+        "bg_game": ("bgGame.png", False, _fallback_fill((SCREEN_WIDTH, SCREEN_HEIGHT), (5, 5, 30))),
+        "splash": ("splash.png", False, _fallback_fill((SCREEN_WIDTH, SCREEN_HEIGHT), (10, 10, 30))),
+    }
+    # ukuran yang dipakai tiap class
+    SIZES = {
+        "player": (80, 80),
+        "enemy": (70, 70),
+        "boss": (200, 200),
+        "menu_bg": (SCREEN_WIDTH, SCREEN_HEIGHT),
+        "bg_game": (SCREEN_WIDTH, SCREEN_HEIGHT),
+        "splash": (SCREEN_WIDTH, SCREEN_HEIGHT),
+    }
+    # name: (file, volume)
+    SOUNDS = {
+        "shoot": ("shoot.wav", 0.4),
+        "boss_explosion": ("boss_explosion.wav", 0.9),
+        "heal": ("heal.wav", 0.5),
+        "game_over": ("GameOverfx.wav", 0.5),
+    }
+
+    def __init__(self, sprites=SPRITES):
+        self.sprites = sprites
+        self.images = {}
+        self.sounds = {}
+        self.load_times = {}     # name -> detik
+        self.failed = []         # asset yang jatuh ke fallback / tidak ada
+
+    def image(self, name):
+        img = self.images.get(name)
+        if img is None:
+            img = self.finish_image(*self.decode_image(name))
+        return img
+
+    def decode_image(self, name):
+        # decode file saja (aman di thread lain), convert() harus di main thread
+        start = time.perf_counter()
+        try:
+            raw = pygame.image.load(resource_path(self.IMAGES[name][0]))
+        except:
+            raw = None
+        return name, raw, time.perf_counter() - start
+
+    def finish_image(self, name, raw, elapsed):
+        _, alpha, fallback = self.IMAGES[name]
+        start = time.perf_counter()
+        if raw is None:
+            img = fallback()
+            self.failed.append(name)
+        else:
+            img = raw.convert_alpha() if alpha else raw.convert()
+        self.load_times[name] = elapsed + time.perf_counter() - start
+        self.images[name] = img
+        return img
+
+    def scaled(self, name, size=None):
+        size = size or self.SIZES[name]
+        img = self.image(name)
+        if img.get_size() == size:
+            return img
+        return self.sprites.scaled(name, img, size)
+
+    def sound(self, name):
+        if name in self.sounds:
+            return self.sounds[name]
+        snd = None
+        if pygame.mixer.get_init():
+            filename, volume = self.SOUNDS[name]
+            start = time.perf_counter()
+            try:
+                snd = pygame.mixer.Sound(resource_path(filename))
+                snd.set_volume(volume)
+            except:
+                self.failed.append(name)
+            self.load_times[name] = time.perf_counter() - start
+        self.sounds[name] = snd
+        return snd
+
+    def load_all(self):
+        for name in self.IMAGES:
+            self.scaled(name)
+        for name in self.SOUNDS:
+            self.sound(name)
+
+    def load_async(self, workers=None):
+        return AssetLoader(self, workers)
+
+    def stats(self):
+        return {
+            "images": len(self.images),
+            "sounds": sum(1 for s in self.sounds.values() if s is not None),
+            "failed": list(self.failed),
+            "load_time": sum(self.load_times.values()),
+            "load_times": dict(self.load_times),
+        }
+
+
+class AssetLoader:
+    # Decode semua image & sound paralel di thread pool. poll() dipanggil
+    # tiap frame dari main thread: hasil yang sudah selesai di-convert dan
+    # di-scale, progress = asset selesai / total (bukan timer palsu).
+    def __init__(self, assets, workers=None):
+        self.assets = assets
+        images = [n for n in assets.IMAGES if n not in assets.images]
+        sounds = [n for n in assets.SOUNDS if n not in assets.sounds] if pygame.mixer.get_init() else []
+        self.total = len(images) + len(sounds)
+        self.done = 0
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers or min(8, self.total or 1), thread_name_prefix="assets")
+        self.pending = {self.executor.submit(assets.decode_image, n) for n in images}
+        self.pending |= {self.executor.submit(assets.sound, n) for n in sounds}
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def progress(self):
+        return self.done / self.total if self.total else 1.0
+
+    def poll(self, timeout=0):
+        # return True kalau semua asset sudah selesai
+        if self.pending:
+            finished, self.pending = concurrent.futures.wait(
+                self.pending, timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                result = future.result()
+                if isinstance(result, tuple):
+                    name = result[0]
+                    self.assets.finish_image(*result)
+                    self.assets.scaled(name)
+                self.done += 1
+            if not self.pending:
+                self.elapsed = time.perf_counter() - self.start
+                self.executor.shutdown(wait=False)
+        return not self.pending
+
+
+ASSETS = AssetManager()
+
+
+def load_images():
+    # image yang dipakai GameState, sudah di-scale ke ukuran pakainya
+    return {name: ASSETS.scaled(name) for name in ("player", "enemy", "boss", "menu_bg", "bg_game")}
+
+
+# === AUDIO ===
+
+class AudioMixer:
+    # Semua efek diputar lewat pool channel tetap dengan prioritas: kalau
+    # channel penuh, suara prioritas terendah (paling lama) yang dipotong,
+    # bukan boss explosion. Efek yang berulang dibatasi interval & jumlah
+    # voice. Decode sound dan load musik jalan di thread background.
+    PRIORITY = {
+        "boss_explosion": 3,
+        "game_over": 3,
+        "heal": 2,
+        "shoot": 1,
+    }
+    # name: (interval minimum ms, voice maksimum)
+    LIMITS = {
+        "shoot": (60, 3),
+        "heal": (100, 1),
+    }
+
+    def __init__(self, assets=ASSETS, num_channels=8, music=GAME_MUSIC_LIST):
+        self.assets = assets
+        self.num_channels = num_channels
+        self.music = music
+        self.music_index = 0
+        self.channels = []
+        self.playing = {}        # channel index -> (priority, start_ms, name)
+        self.last_played = {}
+        self.dropped = 0
+        self._jobs = queue.Queue()
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return pygame.mixer.get_init() is not None
+
+    def _start(self):
+        if self._thread is None:
+            pygame.mixer.set_num_channels(self.num_channels)
+            pygame.mixer.set_reserved(self.num_channels)
+            self.channels = [pygame.mixer.Channel(i) for i in range(self.num_channels)]
+            self._thread = threading.Thread(target=self._run, name="audio", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            kind, arg = job
+            if kind == "sounds":
+                for name in arg:
+                    self.assets.sound(name)
+            elif kind == "music":
+                try:
+                    pygame.mixer.music.load(resource_path(arg))
+                    pygame.mixer.music.play(-1)
+                except pygame.error:
+                    pass
+
+    def preload(self, names=None):
+        if self.enabled:
+            self._start()
+            self._jobs.put(("sounds", list(names or AssetManager.SOUNDS)))
+
+    def next_music(self):
+        # track berikutnya di-load di thread, menu tidak menunggu decode mp3
+        if not self.enabled or not self.music:
+            return
+        self._start()
+        pygame.mixer.music.stop()
+        self._jobs.put(("music", self.music[self.music_index]))
+        self.music_index = (self.music_index + 1) % len(self.music)
+
+    def stop_music(self):
+        if self.enabled:
+            pygame.mixer.music.stop()
+
+    def play(self, name):
+        if not self.channels:
+            return None
+        # belum selesai di-decode -> lewati, jangan blocking
+        snd = self.assets.sounds.get(name)
+        if snd is None:
+            return None
+
+        now = pygame.time.get_ticks()
+        priority = self.PRIORITY.get(name, 1)
+        for i in list(self.playing):
+            if not self.channels[i].get_busy():
+                del self.playing[i]
+
+        limit = self.LIMITS.get(name)
+        if limit:
+            interval, voices = limit
+            if now - self.last_played.get(name, -interval) < interval:
+                self.dropped += 1
+                return None
+            if sum(1 for p in self.playing.values() if p[2] == name) >= voices:
+                self.dropped += 1
+                return None
+
+        index = next((i for i in range(self.num_channels) if i not in self.playing), None)
+        if index is None:
+            # curi channel dengan prioritas terendah, yang paling lama main
+            index = min(self.playing, key=lambda i: self.playing[i][:2])
+            if self.playing[index][0] > priority:
+                self.dropped += 1
+                return None
+            self.channels[index].stop()
+
+        self.channels[index].play(snd)
+        self.playing[index] = (priority, now, name)
+        self.last_played[name] = now
+        return self.channels[index]
+
+    def close(self):
+        if self._thread is not None:
+            self._jobs.put(None)
+            self._thread.join(1.0)
+            self._thread = None
+
+
+AUDIO = AudioMixer()
+
+
+# === WAVES ===
+
+class EntityRegistry:
+    # Satu Group per kind (atribut KIND di class sprite): membership dan jumlah
+    # O(1), kill() otomatis mengeluarkan sprite dari group kind-nya
+    KINDS = ("player", "enemy", "boss", "bullet", "item_spread", "item_heal", "laser", "explosion")
 
-        screen.blit(over, (SCREEN_WIDTH // 2 - over.get_width() // 2, SCREEN_HEIGHT // 4))
-        screen.blit(skor, (SCREEN_WIDTH // 2 - skor.get_width() // 2, SCREEN_HEIGHT // 2 - 40))
-        screen.blit(hs_text, (SCREEN_WIDTH // 2 - hs_text.get_width() // 2, SCREEN_HEIGHT // 2))
+    def __init__(self):
+        self.groups = {kind: pygame.sprite.Group() for kind in self.KINDS}
+
+    def add(self, sprite):
+        self.groups[sprite.KIND].add(sprite)
+
+    def __getitem__(self, kind):
+        return self.groups[kind]
+
+    def count(self, kind):
+        return len(self.groups[kind])
+
+
+WAVES_FILE = "waves.json"
+# kolom wave table; None = ambil dari GAME_PARAMS / rumus bawaan
+WAVE_DEFAULTS = {
+    "stage": 1,
+    "initial_enemies": 5,
+    "enemy_cap": None,
+    "enemy_interval": None,
+    "enemy_burst": 1,            # musuh per spawn
+    "item_interval": None,
+    "heal_chance": None,         # rata-rata frame antar heal (1/p)
+    "bosses": 1,                 # boss berurutan per stage
+    "boss_gap": 120,             # frame antara boss di stage yang sama
+    "boss_hp": None,
+}
+_waves_cache = {}
+
+
+def load_waves(path=WAVES_FILE):
+    # wave table JSON: list baris {"stage": n, ...}; baris berlaku mulai stage
+    # itu dan mewarisi nilai baris sebelumnya. File tidak ada -> 1 baris default
+    path = resource_path(path)
+    if path in _waves_cache:
+        return _waves_cache[path]
+    rows = [{}]
+    if os.path.exists(path):
+        with open(path) as f:
+            rows = json.load(f)
+        if not isinstance(rows, list) or not rows:
+            raise ValueError(f"{path}: wave table harus list baris yang tidak kosong")
+    for row in rows:
+        _check_wave_row(path, row)
+    table = []
+    merged = dict(WAVE_DEFAULTS)
+    for row in sorted(rows, key=lambda r: r.get("stage", 1)):
+        merged = dict(merged, **row)
+        table.append(merged)
+    _waves_cache[path] = table
+    return table
+
+
+def _check_wave_row(path, row):
+    # divalidasi saat load, bukan saat kolom itu pertama dipakai di tengah game
+    if not isinstance(row, dict):
+        raise ValueError(f"{path}: baris wave harus object, bukan {row!r}")
+    unknown = set(row) - set(WAVE_DEFAULTS)
+    if unknown:
+        raise ValueError(f"{path}: kolom wave tidak dikenal: {', '.join(sorted(unknown))}")
+    for key, value in row.items():
+        if value is None and WAVE_DEFAULTS[key] is None:
+            continue        # None = pakai nilai dari GAME_PARAMS
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{path}: {key} harus angka, bukan {value!r}")
+        if key in ("stage", "bosses", "heal_chance", "enemy_cap", "enemy_burst", "boss_hp"):
+            if value <= 0:
+                raise ValueError(f"{path}: {key} harus > 0, bukan {value!r}")
+        elif value < 0:
+            raise ValueError(f"{path}: {key} tidak boleh negatif, bukan {value!r}")
+    if not isinstance(row.get("stage", 1), int):
+        raise ValueError(f"{path}: stage harus bilangan bulat, bukan {row['stage']!r}")
+
+
+class WaveScheduler:
+    # Spawn dijadwalkan di depan lewat priority queue (frame, urutan, jenis);
+    # step() hanya memproses event yang jatuh tempo, bukan roll/timer tiap frame.
+    def __init__(self, state, table):
+        self.state = state
+        self.table = table
+        self.events = []
+        self.seq = 0
+        self.bosses_left = 0
+        self.wave = self.wave_for(state.boss_stage)
+
+    def wave_for(self, stage):
+        # baris terakhir dengan stage <= stage, nilai None diisi dari params
+        row = self.table[0]
+        for r in self.table:
+            if r["stage"] <= stage:
+                row = r
+        params = self.state.params
+        return {k: params[k] if v is None and k in params else v for k, v in row.items()}
+
+    def schedule(self, delay, kind):
+        heapq.heappush(self.events, (self.state.frame + delay, self.seq, kind))
+        self.seq += 1
+
+    def start(self):
+        state = self.state
+        for _ in range(self.wave["initial_enemies"]):
+            state.spawn_enemy()
+        self.schedule(self.wave["enemy_interval"] + 1, "enemy")
+        self.schedule(self.wave["item_interval"] + 1, "item")
+        self.schedule(self.heal_delay(), "heal")
+
+    def heal_delay(self):
+        # jeda geometrik = peluang 1/heal_chance tiap frame, di-roll sekali
+        p = 1.0 / self.wave["heal_chance"]
+        if p >= 1.0:
+            return 1
+        return int(math.log(1.0 - self.state.rng.random()) / math.log(1.0 - p)) + 1
+
+    def stage_cleared(self):
+        # dipanggil saat boss mati; return True kalau stage naik
+        self.bosses_left -= 1
+        if self.bosses_left > 0:
+            self.schedule(self.wave["boss_gap"], "boss")
+            return False
+        self.wave = self.wave_for(self.state.boss_stage + 1)
+        return True
+
+    def boss_due(self):
+        state = self.state
+        return (not state.boss_spawned and self.bosses_left == 0
+                and state.score >= state.boss_stage * state.params["boss_score_step"])
 
-        # deteksi mouse
-        mouse_pos = pygame.mouse.get_pos()
-        mouse_click = pygame.mouse.get_pressed()[0]
+    def update(self):
+        state = self.state
+        if self.boss_due():
+            self.bosses_left = self.wave["bosses"]
+            state.spawn_boss()
+
+        events = self.events
+        while events and events[0][0] <= state.frame:
+            _, _, kind = heapq.heappop(events)
+            wave = self.wave
+            if kind == "enemy":
+                # cap penuh -> coba lagi frame berikutnya (sama seperti timer lama);
+                # burst dipotong supaya tidak melewati cap
+                room = wave["enemy_cap"] - state.entities.count("enemy")
+                if room > 0:
+                    for _ in range(min(wave["enemy_burst"], room)):
+                        state.spawn_enemy()
+                    self.schedule(wave["enemy_interval"] + 1, "enemy")
+                else:
+                    self.schedule(1, "enemy")
+            elif kind == "item":
+                state.spawn_item(Item)
+                self.schedule(wave["item_interval"] + 1, "item")
+            elif kind == "heal":
+                state.spawn_item(ItemHeal)
+                self.schedule(self.heal_delay(), "heal")
+            elif kind == "boss":
+                state.spawn_boss()
 
-        # --- BUTTON RETRY ---
-        if retry_rect.collidepoint(mouse_pos):
-            pygame.draw.rect(screen, BTN_HOVER, retry_rect, border_radius=15)
-            if mouse_click:
-                return "retry"
-        else:
-            pygame.draw.rect(screen, BTN_NORMAL, retry_rect, border_radius=15)
 
-        retry_text = font.render("MAIN LAGI", True, BTN_TEXT)
-        screen.blit(retry_text, (retry_rect.centerx - retry_text.get_width() // 2,
-                                 retry_rect.centery - retry_text.get_height() // 2))
+# === SIMULATION ===
 
-        # --- BUTTON QUIT ---
-        if quit_rect.collidepoint(mouse_pos):
-            pygame.draw.rect(screen, BTN_HOVER, quit_rect, border_radius=15)
-            if mouse_click:
-                return "quit"
-        else:
-            pygame.draw.rect(screen, BTN_NORMAL, quit_rect, border_radius=15)
+class KeyState:
+    # pengganti pygame.key.get_pressed() untuk input scripted / headless
+    def __init__(self, pressed=()):
+        self.pressed = set(pressed)
 
-        quit_text = font.render("KELUAR", True, BTN_TEXT)
-        screen.blit(quit_text, (quit_rect.centerx - quit_text.get_width() // 2,
-                                quit_rect.centery - quit_text.get_height() // 2))
+    def __getitem__(self, key):
+        return key in self.pressed
 
-        pygame.display.flip()
 
-        # event quit aplikasi
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+class FrameInput:
+    # input satu tick: tombol arah yang ditahan + jumlah tekan SPACE
+    def __init__(self, keys=None, fire=0):
+        self.keys = keys if keys is not None else KeyState()
+        self.fire = fire
 
 
+NO_INPUT = FrameInput()
 
-# === MAIN ===
-def main():
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    pygame.display.set_caption("Space Shooter - HP Bar Edition")
-    clock = pygame.time.Clock()
-    font = pygame.font.SysFont(None, 36)
 
-    # load assets (with fallback)
-    try:
-        player_img = pygame.image.load(resource_path("Pesawat.png")).convert_alpha()
-    except:
-        player_img = pygame.Surface((80, 80), pygame.SRCALPHA)
-        pygame.draw.polygon(player_img, (0, 150, 255), [(40,0),(0,80),(80,80)])
+class GameState:
+    # Satu sesi permainan. step() memajukan simulasi satu tick tetap (1/FPS)
+    # tanpa menyentuh display, draw() menggambar state ke surface.
+    # Semua angka acak dari self.rng (di-seed) dan timer dihitung dari jumlah
+    # tick, jadi seed + input yang sama selalu menghasilkan game yang sama.
+    def __init__(self, images, audio=None, seed=None, params=None, waves=None,
+                 pixel_collision=False, num_players=1):
+        self.images = images
+        self.audio = audio
+        self.params = dict(GAME_PARAMS, **(params or {}))
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
 
-    try:
-        enemy_img = pygame.image.load(resource_path("Musuh.png")).convert_alpha()
-    except:
-        enemy_img = pygame.Surface((70, 70))
-        enemy_img.fill((200, 50, 50))
+        # Setup groups
+        self.all_sprites = pygame.sprite.Group()
+        self.enemies = pygame.sprite.Group()    # musuh kecil + boss
+        self.bullets = pygame.sprite.Group()
+        self.items = pygame.sprite.Group()      # includes Item (spread) and ItemHeal
+        self.boss_lasers = pygame.sprite.Group()
+        self.explosions = pygame.sprite.Group()
+        self.particles = ParticleSystem()
+        self.projectiles = ProjectileSystem()   # peluru boss (SoA, bukan sprite)
+        self.entities = EntityRegistry()       # group per kind, lihat KIND
+        self.on_collide = {pair: getattr(self, name) for pair, name in self.COLLISION_HANDLERS.items()}
+
+        # broadphase collision per group; pixel_collision -> cek mask setelah rect
+        self.pixel_collision = pixel_collision
+        self.collided = collide_mask_cached if pixel_collision else None
+        self.enemy_grid = SpatialHash(self.enemies)
+        self.bullet_grid = SpatialHash(self.bullets)
+        self.item_grid = SpatialHash(self.items)
+        self.laser_grid = SpatialHash(self.boss_lasers, cell_size=SCREEN_HEIGHT)
+
+        # players[0] = self.player; co-op menambah pesawat berwarna lain
+        self.players = [self.register(Player(images["player"]), self.all_sprites)]
+        for i in range(1, num_players):
+            variant = f"player{i + 1}"
+            img = SPRITES.get(variant, (80, 80), lambda: tint_image(
+                SPRITES.scaled("player", images["player"], (80, 80)), PLAYER_TINTS[i % len(PLAYER_TINTS)]))
+            self.players.append(self.register(Player(img, variant), self.all_sprites))
+        self.player = self.players[0]
+        if num_players > 1:
+            gap = SCREEN_WIDTH // (num_players + 1)
+            for i, p in enumerate(self.players):
+                p.rect.centerx = gap * (i + 1)
+
+        self.score = 0
+        self.frame = 0
+        self.game_over = False
+        self.profiler = None
+        self.damage_taken = {"enemy": 0, "laser": 0, "projectile": 0}
+
+        self.boss = None
+        self.boss_spawned = False
+        self.boss_stage = 1
+
+        self.laser_delay = self.params["laser_delay"]
+        self.laser_duration = self.params["laser_duration"]
+        self.laser_last = 0
+        self.laser_active = False
+        self.laser_start_time = 0
+
+        # pola tembakan boss, bergiliran tiap boss_pattern_interval frame
+        self.pattern_index = 0
+        self.pattern_start = 0
+
+        # background scroll
+        self.bg_y1 = 0
+        self.bg_y2 = -SCREEN_HEIGHT
+        self.bg_speed = 3
+        self.bg_scroll = True     # False -> background statis (QualityGovernor)
+
+        # spawn musuh awal & jadwal spawn dari wave table
+        self.waves = WaveScheduler(self, waves or load_waves())
+        self.waves.start()
+
+    @property
+    def time_ms(self):
+        # waktu simulasi (ms) dari jumlah tick, bukan jam dinding
+        return self.frame * 1000 // FPS
+
+    def play_sound(self, name):
+        if self.audio:
+            self.audio.play(name)
+
+    def register(self, sprite, *groups):
+        for group in groups:
+            group.add(sprite)
+        self.entities.add(sprite)
+        return sprite
+
+    def spawn_enemy(self):
+        return self.register(Enemy.spawn(self.images["enemy"], self.rng), self.all_sprites, self.enemies)
+
+    def spawn_item(self, cls):
+        return self.register(cls.spawn(self.rng), self.all_sprites, self.items)
+
+    def spawn_boss(self):
+        stage = self.boss_stage
+        boss_hp = self.waves.wave["boss_hp"] or (
+            self.params["boss_base_hp"] + (stage - 1) * self.params["boss_hp_per_stage"])
+        self.boss = self.register(Boss(self.images["boss"], boss_hp), self.all_sprites, self.enemies)
+        self.boss_spawned = True
+        return self.boss
+
+    def add_explosion(self, x, y, boss=False):
+        boom = Explosion(x, y, boss=boss, particles=self.particles, rng=self.rng)
+        return self.register(boom, self.all_sprites, self.explosions)
+
+    def alive_players(self):
+        return [p for p in self.players if p.hp > 0]
+
+    def step(self, inputs=NO_INPUT, *more_inputs):
+        # satu FrameInput per player (co-op: step(p1, p2)), kurang -> NO_INPUT
+        if self.game_over:
+            return
+        self.frame += 1
+        prof = self.profiler
+        inputs = (inputs,) + more_inputs
+        inputs += (NO_INPUT,) * (len(self.players) - len(inputs))
+        players = self.alive_players()
+
+        # shooting
+        for player, player_input in zip(self.players, inputs):
+            if player.hp <= 0:
+                continue
+            for _ in range(player_input.fire):
+                self.play_sound("shoot")
+                for b in player.shoot():
+                    self.register(b, self.all_sprites, self.bullets)
+        if prof:
+            prof.mark("input")
+
+        # spawn musuh/item/boss yang jatuh tempo
+        self.waves.update()
+        if prof:
+            prof.mark("spawn")
+
+        # update
+        for player, player_input in zip(self.players, inputs):
+            player.controls = player_input.keys
+        self.all_sprites.update()
+        self.particles.update()
+        if prof:
+            prof.mark("update")
+
+        # boss laser behaviour
+        if self.boss_spawned:
+            now = self.time_ms
+            if not self.laser_active and now - self.laser_last > self.laser_delay:
+                self.register(BossLaser(self.boss), self.boss_lasers)
+                self.laser_active = True
+                self.laser_start_time = now
+            if self.laser_active and now - self.laser_start_time > self.laser_duration:
+                self.boss_lasers.empty()
+                self.laser_active = False
+                self.laser_last = now
+
+        self.boss_lasers.update()
+
+        # pola tembakan boss (radial / spiral / fan) -> ProjectileSystem;
+        # hanya boss yang masih hidup & sudah selesai turun
+        boss = self.boss
+        if self.boss_spawned and boss.alive() and boss.rect.top >= 20:
+            self.fire_boss_pattern()
+        self.projectiles.update()
+
+        # scrolling background
+        self.bg_y1 += self.bg_speed
+        self.bg_y2 += self.bg_speed
+        if self.bg_y1 >= SCREEN_HEIGHT:
+            self.bg_y1 = -SCREEN_HEIGHT
+        if self.bg_y2 >= SCREEN_HEIGHT:
+            self.bg_y2 = -SCREEN_HEIGHT
+        if prof:
+            prof.mark("laser")
+
+        # bullet hits, handler per pasangan kind (lihat COLLISION_HANDLERS)
+        on_collide = self.on_collide
+        self.bullet_grid.refresh()
+        collided = self.collided
+        hits = self.bullet_grid.groupcollide(self.enemies, False, True, collided)
+        for enemy in hits:
+            on_collide["bullet", enemy.KIND](enemy)
+
+        # pick up items (both spread items and heal)
+        self.item_grid.refresh()
+        self.enemy_grid.refresh()
+        self.laser_grid.refresh()
+        for player in players:
+            for it in self.item_grid.spritecollide(player, True, collided):
+                on_collide["player", it.KIND](it, player)
+            self.collide_player(player, collided)
+
+        if prof:
+            prof.mark("collide")
+
+        for player in players:
+            # clamp hp
+            if player.hp < 0:
+                player.hp = 0
+            # co-op: pesawat yang HP-nya habis keluar dari game
+            if player.hp <= 0 and len(self.players) > 1:
+                self.add_explosion(player.rect.centerx, player.rect.centery, boss=False)
+                player.kill()
+
+        # game over check (semua player habis)
+        if not self.alive_players():
+            self.game_over = True
+
+    def collide_player(self, player, collided):
+        # enemy collision with player (damage)
+        hit_enemy = self.enemy_grid.spritecollide(player, True, collided)
+        if hit_enemy and player.invincible == 0:
+            # small enemy collision damage (reduce hp by 15)
+            player.hp -= 15
+            player.invincible = 40
+            self.damage_taken["enemy"] += 15
+
+            # spawn small explosion(s) for the killed enemy(s)
+            for _ in hit_enemy:
+                self.add_explosion(player.rect.centerx, player.rect.centery, boss=False)
+        # boss yang ditabrak ikut mati (sama seperti game asli), tapi harus
+        # lewat jalur boss mati supaya pola/laser berhenti & stage lanjut
+        for enemy in hit_enemy:
+            if enemy.KIND == "boss":
+                self.destroy_boss(enemy)
+
+        # laser collision (boss laser)
+        if self.laser_grid.spritecollide(player, False, collided) and player.invincible == 0:
+            player.hp -= 30
+            player.invincible = 50
+            self.damage_taken["laser"] += 30
+
+        # peluru boss: tes massal ke hitbox kecil di tengah pesawat
+        if player.invincible == 0 and self.projectiles.collide_rect(player.rect.inflate(-50, -50)):
+            damage = self.params["projectile_damage"]
+            player.hp -= damage
+            player.invincible = 30
+            self.damage_taken["projectile"] += damage
+
+    BOSS_PATTERNS = ("radial", "spiral", "fan")
+
+    def fire_boss_pattern(self):
+        interval = self.params["boss_pattern_interval"]
+        t = self.frame - self.pattern_start
+        if t >= interval:
+            self.pattern_index = (self.pattern_index + 1) % len(self.BOSS_PATTERNS)
+            self.pattern_start = self.frame
+            t = 0
+        pattern = self.BOSS_PATTERNS[self.pattern_index]
+        speed = self.params["projectile_speed"]
+        stage = self.boss_stage
+        boss = self.boss
+        x, y = boss.rect.centerx, boss.rect.bottom - 40
+        proj = self.projectiles
+
+        if pattern == "radial":
+            if t == 0:
+                proj.radial(x, y, 12 + 6 * stage, speed)
+        elif pattern == "spiral":
+            # beberapa lengan yang berputar, jeda di akhir pola
+            if t % 4 == 0 and t < interval - 30:
+                proj.radial(x, y, 2 + stage, speed * 0.8, offset=t * 0.15)
+        elif pattern == "fan":
+            if t % 20 == 0 and t < 60:
+                # bidik pesawat yang masih hidup, bergiliran tiap fan
+                players = self.alive_players() or self.players
+                target = players[(t // 20) % len(players)].rect.center
+                proj.fan(x, y, target[0], target[1], 3 + 2 * stage, 0.8, speed * 1.2)
+
+    # --- Collision handlers ---
+    COLLISION_HANDLERS = {
+        ("bullet", "enemy"): "bullet_hits_enemy",
+        ("bullet", "boss"): "bullet_hits_boss",
+        ("player", "item_spread"): "pickup_spread",
+        ("player", "item_heal"): "pickup_heal",
+    }
+
+    def bullet_hits_boss(self, boss):
+        boss.hp -= 5
+        if boss.hp <= 0:
+            self.destroy_boss(boss)
+            self.score += 150
+
+    def destroy_boss(self, boss):
+        # boss explosion sound
+        self.play_sound("boss_explosion")
+        self.add_explosion(boss.rect.centerx, boss.rect.centery, boss=True)
+        boss.kill()
+        self.boss = None
+        self.boss_spawned = False
+        if self.waves.stage_cleared():
+            self.boss_stage += 1
+
+    def bullet_hits_enemy(self, enemy):
+        # small enemy -> small explosion
+        self.add_explosion(enemy.rect.centerx, enemy.rect.centery, boss=False)
+        enemy.kill()
+        self.score += 10
+        # spawn replacement
+        self.spawn_enemy()
+
+    def pickup_heal(self, item, player):
+        player.hp += 30
+        if player.hp > player.max_hp:
+            player.hp = player.max_hp
+        self.play_sound("heal")
+
+    def pickup_spread(self, item, player):
+        # regular spread item
+        player.spread_mode = True
+        player.spread_timer = 300
+
+    def draw(self, screen, font, highscore):
+        # screen boleh lebih kecil/besar dari SCREEN_WIDTH x SCREEN_HEIGHT
+        # (render target), posisi & image di-scale, image hasil scale di-cache
+        scale = screen.get_width() / SCREEN_WIDTH
+        bg_game = self.images["bg_game"]
+        if scale != 1:
+            bg_game = SPRITES.scaled("bg_game", bg_game, screen.get_size())
+        if self.bg_scroll:
+            screen.blit(bg_game, (0, round(self.bg_y1 * scale)))
+            screen.blit(bg_game, (0, round(self.bg_y2 * scale)))
+        else:
+            screen.blit(bg_game, (0, 0))
 
-    try:
-        boss_img = pygame.image.load(resource_path("Boss.png")).convert_alpha()
-    except:
-        boss_img = pygame.Surface((200, 200))
-        boss_img.fill((100, 0, 120))
+        # explosions ada di all_sprites, partikelnya digambar di draw_overlay
+        if scale == 1:
+            self.all_sprites.draw(screen)
+            self.boss_lasers.draw(screen)
+        else:
+            draw_scaled(screen, self.all_sprites, scale)
+            draw_scaled(screen, self.boss_lasers, scale)
+        if self.profiler:
+            self.profiler.mark("draw")
+        self.draw_overlay(screen, font, highscore)
+        if self.profiler:
+            self.profiler.mark("hud")
+
+    def draw_overlay(self, screen, font, highscore):
+        # peluru boss, partikel ledakan, HP bar boss & HUD; return area layar yang digambar
+        scale = screen.get_width() / SCREEN_WIDTH
+        rects = self.projectiles.draw(screen, scale)
+        rects.extend(self.particles.draw(screen, scale))
+
+        # draw boss hp bars (if any)
+        for boss in self.entities["boss"]:
+            bar_w = round(150 * scale)
+            bar_h = round(10 * scale)
+            fill = int(bar_w * (boss.hp / boss.max_hp))
+            bar_x = round(boss.rect.centerx * scale) - bar_w // 2
+            bar_y = round((boss.rect.y - 20) * scale)
+            rects.append(pygame.draw.rect(screen, (60, 60, 60), (bar_x, bar_y, bar_w, bar_h)))
+            pygame.draw.rect(screen, (255, 0, 0), (bar_x, bar_y, fill, bar_h))
+
+        # HUD: score & highscore & player HP bar (font sudah seukuran render target)
+        score_text = TEXT.render(font, f"Score: {self.score}", WHITE)
+        rects.append(screen.blit(score_text, (round(10 * scale), round(40 * scale))))
+        hs_text = TEXT.render(font, f"High Score: {highscore}", WHITE)
+        rects.append(screen.blit(hs_text, (round(10 * scale), round(70 * scale))))
+
+        rects.extend(draw_player_hp(screen, self.player, scale))
+        for i, player in enumerate(self.players[1:], 1):
+            rects.extend(draw_player_hp(screen, player, scale, slot=i))
+        return rects
+
+
+# === QUALITY ===
+
+class QualityGovernor:
+    # Pantau waktu kerja per frame (tanpa idle clock.tick) terhadap budget
+    # 1000/FPS ms. Rata-rata bergerak lewat batas atas -> turun satu level,
+    # cukup lama di bawah batas bawah -> naik lagi. Hanya visual, simulasi
+    # tidak terpengaruh (replay tetap sama).
+    LEVELS = (
+        {"particles": 1.0, "smoke": True, "bg_scroll": True},
+        {"particles": 0.6, "smoke": True, "bg_scroll": True},
+        {"particles": 0.35, "smoke": False, "bg_scroll": True},
+        {"particles": 0.2, "smoke": False, "bg_scroll": False},
+    )
 
-    try:
-        menu_bg = pygame.image.load(resource_path("Tekan (3).png")).convert_alpha()
-    except:
-        menu_bg = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        menu_bg.fill((20,20,40))
+    def __init__(self, budget_ms=1000.0 / FPS, high=0.9, low=0.5,
+                 down_after=30, up_after=180, level=0, auto=True):
+        self.budget_ms = budget_ms
+        self.high = high
+        self.low = low
+        self.down_after = down_after
+        self.up_after = up_after
+        self.level = level
+        self.auto = auto
+        self.avg_ms = 0.0
+        self.since_change = 0
+        self.changes = 0
+
+    def settings(self):
+        return self.LEVELS[self.level]
+
+    def update(self, work_ms):
+        # return True kalau level berubah
+        self.avg_ms += (work_ms - self.avg_ms) * 0.1
+        self.since_change += 1
+        if not self.auto:
+            return False
+        level = self.level
+        if self.avg_ms > self.budget_ms * self.high and self.since_change >= self.down_after:
+            level = min(level + 1, len(self.LEVELS) - 1)
+        elif self.avg_ms < self.budget_ms * self.low and self.since_change >= self.up_after:
+            level = max(level - 1, 0)
+        if level == self.level:
+            return False
+        self.level = level
+        self.since_change = 0
+        self.changes += 1
+        return True
+
+    def apply(self, state):
+        cfg = self.settings()
+        state.particles.detail = cfg["particles"]
+        state.particles.smoke = cfg["smoke"]
+        state.bg_scroll = cfg["bg_scroll"]
+
+
+# === PROFILER ===
+
+class FrameProfiler:
+    # Waktu per fase main loop. GameState/main memanggil mark(phase) di akhir
+    # tiap fase; kalau profiler tidak dipasang (None) tidak ada overhead selain
+    # satu cek if per fase. Rata-rata bergulir tampil di overlay (F3), trace
+    # per frame opsional ke CSV / JSON (ditentukan dari ekstensi file).
+    PHASES = ("events", "input", "spawn", "update", "laser", "collide", "draw", "hud", "flip")
+
+    def __init__(self, window=120, trace_path=None):
+        self.window = window
+        self.history = {p: deque(maxlen=window) for p in self.PHASES}
+        self.totals = deque(maxlen=window)
+        self.current = dict.fromkeys(self.PHASES, 0.0)
+        self.counts = {}
+        self.frame = 0
+        self.last = 0.0
+        self.frame_start = 0.0
+        self.visible = False
+
+        self.trace_path = trace_path
+        self.trace_file = None
+        self.trace_rows = None
+        if trace_path:
+            if trace_path.endswith(".json"):
+                self.trace_rows = []
+            else:
+                self.trace_file = open(trace_path, "w", newline="")
+                self.trace_writer = csv.writer(self.trace_file)
+                self.trace_header = False
+            # menu keluar lewat sys.exit(): trace tetap ditulis
+            atexit.register(self.close)
+
+    @property
+    def active(self):
+        return self.visible or self.trace_path is not None
+
+    def begin_frame(self):
+        for p in self.PHASES:
+            self.current[p] = 0.0
+        self.frame_start = self.last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    def end_frame(self, counts=None):
+        total = self.last - self.frame_start
+        for p in self.PHASES:
+            self.history[p].append(self.current[p])
+        self.totals.append(total)
+        self.counts = counts or {}
+        self.frame += 1
+
+        if self.trace_path:
+            row = {"frame": self.frame, "total_ms": round(total * 1000, 4)}
+            for p in self.PHASES:
+                row[p + "_ms"] = round(self.current[p] * 1000, 4)
+            row.update(self.counts)
+            if self.trace_rows is not None:
+                self.trace_rows.append(row)
+            else:
+                if not self.trace_header:
+                    self.trace_writer.writerow(row.keys())
+                    self.trace_header = True
+                self.trace_writer.writerow(row.values())
+
+    def averages(self):
+        # rata-rata ms per fase dalam window terakhir
+        return {p: 1000 * sum(h) / len(h) if h else 0.0 for p, h in self.history.items()}
+
+    def draw_overlay(self, screen):
+        # posisi & ukuran relatif lebar surface (canvas bisa lebih kecil/besar
+        # dari 800x600 dengan --render-scale / window)
+        scale = screen.get_width() / SCREEN_WIDTH
+        font = TEXT.sysfont(None, max(8, round(18 * scale)))
+        avg = self.averages()
+        total = 1000 * sum(self.totals) / len(self.totals) if self.totals else 0.0
+        lines = [f"frame {total:5.2f} ms"]
+        lines += [f"{p:8s} {avg[p]:5.2f} ms" for p in self.PHASES]
+        lines += [f"{k:8s} {v}" for k, v in self.counts.items()]
+
+        line_h = round(14 * scale)
+        pad = round(4 * scale)
+        width = round(160 * scale)
+        panel = pygame.Rect(screen.get_width() - width - round(10 * scale), round(10 * scale),
+                            width, line_h * len(lines) + pad * 2)
+        shade = pygame.Surface(panel.size, pygame.SRCALPHA)
+        shade.fill((0, 0, 0, 160))
+        screen.blit(shade, panel.topleft)
+        for i, line in enumerate(lines):
+            # font.render langsung, angkanya berubah tiap frame
+            screen.blit(font.render(line, True, WHITE), (panel.x + pad + pad // 2, panel.y + pad + i * line_h))
+        return panel.clip(screen.get_rect())
+
+    def close(self):
+        # aman dipanggil lebih dari sekali (main + atexit); trace berhenti setelah close
+        if self.trace_rows is not None:
+            with open(self.trace_path, "w") as f:
+                json.dump({"phases": self.PHASES, "frames": self.trace_rows}, f)
+            self.trace_rows = None
+        if self.trace_file:
+            self.trace_file.close()
+            self.trace_file = None
+        self.trace_path = None
+
+
+# === RENDERING ===
+
+class DirtyRenderer:
+    # Renderer opsional berbasis LayeredDirty: hanya area yang berubah yang
+    # di-update ke layar lewat display.update(rects). Tiap sprite punya layer
+    # tetap dan digambar tepat sekali. Redraw penuh hanya kalau posisi
+    # background berubah; scroll_interval = 0 -> background diam (kiosk),
+    # N -> background digeser tiap N frame.
+    LAYERS = (
+        ("items", 1),
+        ("enemies", 2),
+        ("bullets", 4),
+        ("boss_lasers", 6),
+    )
+    LAYER_BOSS = 3
+    LAYER_PLAYER = 5
+
+    def __init__(self, screen, scroll_interval=0):
+        self.screen = screen
+        self.scroll_interval = scroll_interval
+        self.group = pygame.sprite.LayeredDirty()
+        self.sources = {}           # sprite -> group asal di GameState
+        self.state = None
+        self.background = pygame.Surface(screen.get_size()).convert()
+        self.bg_offset = None
+        self.overlay_rects = []     # area partikel/HUD frame sebelumnya
+
+    def attach(self, state):
+        self.group.empty()
+        self.sources.clear()
+        self.state = state
+        self.bg_offset = None
+        self.overlay_rects = []
+
+    def _sync(self, state):
+        group = self.group
+        sources = self.sources
+
+        # sprite yang sudah keluar dari group asalnya (kill / empty). Sprite
+        # pool yang di-kill lalu di-spawn ulang di frame yang sama sudah
+        # tidak ada di self.group, jadi ikut dicek supaya ditambah lagi.
+        members = group.spritedict
+        for s, src in list(sources.items()):
+            if s not in src.spritedict or s not in members:
+                del sources[s]
+                group.remove(s)
+
+        for name, layer in self.LAYERS:
+            src = getattr(state, name)
+            for s in src.spritedict:
+                if s not in sources:
+                    s.dirty = 2     # semua sprite bergerak tiap frame
+                    group.add(s, layer=self.LAYER_BOSS if s is state.boss else layer)
+                    sources[s] = src
+        if state.player not in sources:
+            state.player.dirty = 2
+            group.add(state.player, layer=self.LAYER_PLAYER)
+            sources[state.player] = state.all_sprites
+
+    def _background_offset(self, state):
+        # bg_scroll False = level governor "background statis", sama seperti draw()
+        if not self.scroll_interval or not state.bg_scroll:
+            return (0, -SCREEN_HEIGHT)
+        if self.bg_offset is None or state.frame % self.scroll_interval == 0:
+            return (state.bg_y1, state.bg_y2)
+        return self.bg_offset
+
+    def draw(self, font, highscore):
+        # return list rect yang harus di-update ke display
+        state = self.state
+        screen = self.screen
+        self._sync(state)
+
+        offset = self._background_offset(state)
+        if offset != self.bg_offset:
+            bg_game = state.images["bg_game"]
+            self.background.blit(bg_game, (0, offset[0]))
+            self.background.blit(bg_game, (0, offset[1]))
+            self.bg_offset = offset
+            self.group.repaint_rect(screen.get_rect())
+            full = True
+        else:
+            full = False
+
+        # hapus partikel/HUD frame lalu (sprite di bawahnya ikut digambar ulang)
+        for r in self.overlay_rects:
+            self.group.repaint_rect(r)
+
+        rects = self.group.draw(screen, self.background)
+        if state.profiler:
+            state.profiler.mark("draw")
+        overlay = state.draw_overlay(screen, font, highscore)
+        if state.profiler:
+            state.profiler.mark("hud")
+        if full:
+            rects = [screen.get_rect()]
+        else:
+            rects.extend(overlay)
+            rects.extend(self.overlay_rects)
+        self.overlay_rects = overlay
+        return rects
+
+
+# --- Render target ---
+
+_scaled_images = {}
+
+
+def scaled_image(img, scale):
+    # versi ter-scale dari image sprite, dibuat sekali per (image, scale)
+    key = (id(img), scale)
+    hit = _scaled_images.get(key)
+    if hit is None or hit[0] is not img:
+        if len(_scaled_images) > 512:
+            _scaled_images.clear()
+        w, h = img.get_size()
+        size = (max(1, round(w * scale)), max(1, round(h * scale)))
+        try:
+            small = pygame.transform.smoothscale(img, size)
+        except ValueError:
+            small = pygame.transform.scale(img, size)
+        hit = _scaled_images[key] = (img, small)
+    return hit[1]
+
+
+def draw_scaled(screen, group, scale):
+    screen.blits([(scaled_image(s.image, scale), (round(s.rect.x * scale), round(s.rect.y * scale)))
+                  for s in group], doreturn=False)
+
+
+class RenderTarget:
+    # Game digambar ke canvas internal (SCREEN_WIDTH x SCREEN_HEIGHT x
+    # render_scale), lalu di-scale ke window sekali per frame: integer
+    # (nearest, faktor bulat kalau muat) atau smooth. Menu tetap digambar di
+    # surface logis 800x600. Kalau semua ukuran sama, canvas = window langsung.
+    def __init__(self, window_size=None, render_scale=1.0, smooth=False):
+        logical_size = (SCREEN_WIDTH, SCREEN_HEIGHT)
+        window_size = tuple(window_size or logical_size)
+        self.window = pygame.display.set_mode(window_size)
+        self.window.fill(BLACK)
+        self.scale = render_scale
+        self.smooth = smooth
+        self.logical = self.window if window_size == logical_size else pygame.Surface(logical_size).convert()
+        render_size = (round(SCREEN_WIDTH * render_scale), round(SCREEN_HEIGHT * render_scale))
+        if render_size == logical_size:
+            self.canvas = self.logical
+        elif render_size == window_size:
+            self.canvas = self.window
+        else:
+            self.canvas = pygame.Surface(render_size).convert()
+        self._dests = {}
+
+    @property
+    def direct(self):
+        # canvas = window, tanpa scaling (syarat renderer dirty-rect)
+        return self.canvas is self.window
+
+    def _dest(self, size):
+        # area di window untuk surface ukuran `size`, aspect ratio dijaga
+        dest = self._dests.get(size)
+        if dest is None:
+            ww, wh = self.window.get_size()
+            w, h = size
+            factor = min(ww // w, wh // h)
+            if self.smooth or factor < 1:
+                factor = min(ww / w, wh / h)
+            rect = pygame.Rect(0, 0, round(w * factor), round(h * factor))
+            rect.center = (ww // 2, wh // 2)
+            dest = self._dests[size] = (rect, self.window.subsurface(rect))
+        return dest
+
+    def present(self, surface=None, rects=None):
+        surface = self.canvas if surface is None else surface
+        if surface is self.window:
+            if rects is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(rects)
+            return
+        rect, sub = self._dest(surface.get_size())
+        if self.smooth:
+            pygame.transform.smoothscale(surface, rect.size, sub)
+        else:
+            pygame.transform.scale(surface, rect.size, sub)
+        pygame.display.flip()
 
-    try:
-        bg_game = pygame.image.load(resource_path("bgGame.png")).convert_alpha()
-    except:
-        bg_game = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        bg_game.fill((5, 5, 30))
+    def to_logical(self, pos):
+        if self.logical is self.window:
+            return pos
+        rect, _ = self._dest(self.logical.get_size())
+        return ((pos[0] - rect.x) * SCREEN_WIDTH // rect.width,
+                (pos[1] - rect.y) * SCREEN_HEIGHT // rect.height)
 
-    # sounds
-    try:
-        shoot_sound = pygame.mixer.Sound(resource_path("shoot.wav"))
-        shoot_sound.set_volume(0.4)
-    except:
-        shoot_sound = None
 
-    try:
-        boss_explosion_sound = pygame.mixer.Sound(resource_path("boss_explosion.wav"))
-        boss_explosion_sound.set_volume(0.9)
-    except:
-        boss_explosion_sound = None
+DISPLAY = None   # RenderTarget aktif, dibuat di main()
 
-    try:
-        heal_sound = pygame.mixer.Sound(resource_path("heal.wav"))
-        heal_sound.set_volume(0.5)
-    except:
-        heal_sound = None
 
-    try:
-        game_over_fx = pygame.mixer.Sound(resource_path("GameOverfx.wav"))
-        game_over_fx.set_volume(0.5)
-    except:
-        game_over_fx = None
+def present(surface=None, rects=None):
+    if DISPLAY is not None:
+        DISPLAY.present(surface, rects)
+    elif rects is None:
+        pygame.display.flip()
+    else:
+        pygame.display.update(rects)
+
+
+def logical_mouse_pos():
+    pos = pygame.mouse.get_pos()
+    return DISPLAY.to_logical(pos) if DISPLAY is not None else pos
+
+
+def read_frame_input(events):
+    # kumpulkan input keyboard satu frame untuk GameState.step
+    fire = 0
+    for event in events:
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+            fire += 1
+    return FrameInput(pygame.key.get_pressed(), fire)
+
+
+def run_headless(frames, policy=None, seed=None, state=None, recording=None):
+    # jalankan simulasi tanpa render & tanpa clock.tick (uncapped).
+    # policy(state) -> FrameInput, default: diam tanpa menembak
+    if state is None:
+        pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        state = GameState(load_images(), seed=seed)
+    for _ in range(frames):
+        if state.game_over:
+            break
+        inputs = policy(state) if policy else NO_INPUT
+        state.step(inputs)
+        if recording is not None:
+            recording.record(inputs, state)
+    return state
+
+
+# === REPLAY ===
+
+# bit 0-3: tombol arah yang ditahan, bit 4-7: jumlah tekan SPACE (maks 15)
+REPLAY_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+REPLAY_MAGIC = b"SPRP"
+REPLAY_VERSION = 3               # 2: spawn lewat WaveScheduler, 3: pola tembakan boss
+REPLAY_HEADER = struct.Struct("<4sHQIB")   # magic, version, seed, frames, flags
+REPLAY_HASHES = 1            # flag: ada hash state per frame
+REPLAY_PIXEL_COLLISION = 2   # flag: game direkam dengan pixel_collision
+
+
+class ReplayDesync(Exception):
+    def __init__(self, frame, expected, actual):
+        super().__init__(f"replay desync di frame {frame}: hash {expected:08x} != {actual:08x}")
+        self.frame = frame
+        self.expected = expected
+        self.actual = actual
+
+
+def encode_input(inputs):
+    keys = inputs.keys
+    code = 0
+    for bit, key in enumerate(REPLAY_KEYS):
+        if keys[key]:
+            code |= 1 << bit
+    return code | (min(inputs.fire, 15) << 4)
+
+
+_DECODED_INPUTS = {}
+
+
+def decode_input(code):
+    # FrameInput hasil decode dipakai bersama (read-only)
+    inputs = _DECODED_INPUTS.get(code)
+    if inputs is None:
+        pressed = [key for bit, key in enumerate(REPLAY_KEYS) if code & (1 << bit)]
+        inputs = _DECODED_INPUTS[code] = FrameInput(KeyState(pressed), code >> 4)
+    return inputs
+
+
+def state_hash(state):
+    # crc32 dari state simulasi yang penting (posisi, HP, timer, skor)
+    player = state.player
+    boss = state.boss if state.boss_spawned else None
+    vals = [
+        state.frame, state.score, state.boss_stage,
+        player.hp, player.invincible, player.spread_timer, player.rect.x, player.rect.y,
+        boss.hp if boss else -1, int(state.laser_active), state.laser_last,
+    ]
+    proj = state.projectiles
+    vals += [proj.count, int(proj.x[:proj.count].sum()), int(proj.y[:proj.count].sum())]
+    for group in (state.enemies, state.bullets, state.items, state.boss_lasers):
+        vals.append(len(group))
+        for s in group:
+            vals.append(s.rect.x)
+            vals.append(s.rect.y)
+    return zlib.crc32(np.array(vals, dtype=np.int64).tobytes())
+
+
+class InputRecording:
+    # Rekaman input per frame + seed; 1 byte per frame (+ 4 byte hash
+    # opsional), disimpan terkompresi zlib.
+    def __init__(self, seed, hashes=True, pixel_collision=False):
+        self.seed = seed
+        self.pixel_collision = pixel_collision
+        self.inputs = bytearray()
+        self.hashes = array("I") if hashes else None
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def record(self, inputs, state=None):
+        # dipanggil setelah state.step(inputs)
+        self.inputs.append(encode_input(inputs))
+        if self.hashes is not None:
+            self.hashes.append(state_hash(state))
+
+    def frame_input(self, i):
+        return decode_input(self.inputs[i])
+
+    def truncate(self, frames):
+        # setelah rewind: buang input sesudah frame tujuan
+        del self.inputs[frames:]
+        if self.hashes is not None:
+            del self.hashes[frames:]
+
+    def to_bytes(self):
+        hashes = self.hashes
+        flags = (REPLAY_HASHES if hashes is not None else 0) | \
+            (REPLAY_PIXEL_COLLISION if self.pixel_collision else 0)
+        header = REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.seed, len(self.inputs), flags)
+        body = bytes(self.inputs)
+        if hashes is not None:
+            h = array("I", hashes)
+            if sys.byteorder != "little":
+                h.byteswap()
+            body += h.tobytes()
+        return header + zlib.compress(body, 9)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, seed, frames, flags = REPLAY_HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError("bukan file replay Space Shooter yang dikenali")
+        body = zlib.decompress(data[REPLAY_HEADER.size:])
+        has_hashes = flags & REPLAY_HASHES
+        rec = cls(seed, hashes=bool(has_hashes), pixel_collision=bool(flags & REPLAY_PIXEL_COLLISION))
+        rec.inputs = bytearray(body[:frames])
+        if has_hashes:
+            rec.hashes.frombytes(body[frames:frames + frames * 4])
+            if sys.byteorder != "little":
+                rec.hashes.byteswap()
+        return rec
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+def play_replay(recording, images=None, verify=True, on_frame=None):
+    # simulasi ulang rekaman tanpa batas FPS; ReplayDesync kalau hash beda
+    if images is None:
+        if not pygame.display.get_surface():
+            pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        images = load_images()
+    state = GameState(images, seed=recording.seed, pixel_collision=recording.pixel_collision)
+    verify = verify and recording.hashes is not None
+    for i in range(len(recording)):
+        state.step(recording.frame_input(i))
+        if verify:
+            actual = state_hash(state)
+            if actual != recording.hashes[i]:
+                raise ReplayDesync(state.frame, recording.hashes[i], actual)
+        if on_frame:
+            on_frame(state)
+    return state
+
+
+# === SNAPSHOT ===
+
+# Snapshot biner state simulasi (tanpa image/audio/partikel): header struct
+# + array NumPy per jenis entity + state RNG. Cukup murah untuk diambil tiap
+# tick ke RewindBuffer; restore_state() mengembalikan state persis sama
+# (state_hash sama, simulasi berikutnya identik). Blok RNG (624 word) ada di
+# akhir karena jarang berubah, RewindBuffer menyimpannya bersama antar slot.
+SNAPSHOT_MAGIC = b"SPSN"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<4sHIIHBiiBihhIIIIhhhBHHIIHd")
+# flags header
+SNAP_GAME_OVER = 1
+SNAP_BOSS_SPAWNED = 2
+SNAP_LASER_ACTIVE = 4
+SNAP_LASER = 8           # ada BossLaser
+SNAP_LASER_ON_BOSS = 16  # laser mengikuti boss yang masih hidup
+SNAP_GAUSS = 32          # rng punya gauss_next
+
+SNAPSHOT_PLAYER = np.dtype([
+    ("x", "<i2"), ("y", "<i2"), ("hp", "<i2"), ("invincible", "<i2"), ("blink_timer", "<i4"),
+    ("spread_timer", "<i2"), ("spread_mode", "u1"), ("alive", "u1"), ("visual", "u1"),
+])
+# a/b/c per kind -> enemy: speed | boss: hp, max_hp, direction | bullet: speedx, speedy | item: speed
+SNAPSHOT_SPRITE = np.dtype([
+    ("kind", "u1"), ("x", "<i2"), ("y", "<i2"), ("a", "<i4"), ("b", "<i2"), ("c", "<i2"),
+])
+SNAPSHOT_EVENT = np.dtype([("frame", "<i4"), ("seq", "<i4"), ("kind", "u1")])
+SNAPSHOT_KINDS = ("enemy", "boss", "bullet", "item_spread", "item_heal")
+SNAPSHOT_KIND_CODE = {kind: i for i, kind in enumerate(SNAPSHOT_KINDS)}
+WAVE_EVENTS = ("enemy", "item", "heal", "boss")
+WAVE_EVENT_CODE = {kind: i for i, kind in enumerate(WAVE_EVENTS)}
+PLAYER_VISUALS = tuple(Player.VISUAL_STATES)
+RNG_WORDS = 624
+RNG_BYTES = RNG_WORDS * 4
+
+
+def snapshot_state(state):
+    # return bytes; urutan sprite = urutan all_sprites (urutan collision)
+    version, words, gauss = state.rng.getstate()
+    rng = array("I", words[:RNG_WORDS])
+    if sys.byteorder != "little":
+        rng.byteswap()
+
+    players = np.array([
+        (p.rect.x, p.rect.y, p.hp, p.invincible, p.blink_timer, p.spread_timer,
+         p.spread_mode, p.alive(), PLAYER_VISUALS.index(p.visual_state))
+        for p in state.players
+    ], dtype=SNAPSHOT_PLAYER)
+
+    rows = []
+    codes = SNAPSHOT_KIND_CODE
+    for s in state.all_sprites:
+        kind = s.KIND
+        code = codes.get(kind)
+        if code is None:
+            continue        # player & explosion (visual saja)
+        if kind == "enemy":
+            rows.append((code, s.rect.x, s.rect.y, s.speed, 0, 0))
+        elif kind == "bullet":
+            rows.append((code, s.rect.x, s.rect.y, s.speedx, s.speedy, 0))
+        elif kind == "boss":
+            rows.append((code, s.rect.x, s.rect.y, s.hp, s.max_hp, s.direction))
+        elif kind == "item_heal":
+            rows.append((code, s.rect.x, s.rect.y, s.speedy, 0, 0))
+        else:
+            rows.append((code, s.rect.x, s.rect.y, s.speed, 0, 0))
+    sprites = np.array(rows, dtype=SNAPSHOT_SPRITE)
+
+    waves = state.waves
+    events = np.array([(f, seq, WAVE_EVENT_CODE[kind]) for f, seq, kind in waves.events],
+                      dtype=SNAPSHOT_EVENT)
+
+    flags = (SNAP_GAME_OVER if state.game_over else 0) | \
+        (SNAP_BOSS_SPAWNED if state.boss_spawned else 0) | \
+        (SNAP_LASER_ACTIVE if state.laser_active else 0) | \
+        (SNAP_GAUSS if gauss is not None else 0)
+    laser_x = laser_boss_x = 0
+    for laser in state.boss_lasers:
+        flags |= SNAP_LASER
+        if laser.boss is state.boss and laser.boss.alive():
+            flags |= SNAP_LASER_ON_BOSS
+        laser_x = laser.rect.centerx
+        laser_boss_x = laser.boss.rect.centerx
+
+    proj = state.projectiles
+    n = proj.count
+    damage = state.damage_taken
+    header = SNAPSHOT_HEADER.pack(
+        SNAPSHOT_MAGIC, SNAPSHOT_VERSION, state.frame, state.score, state.boss_stage, flags,
+        state.laser_last, state.laser_start_time, state.pattern_index, state.pattern_start,
+        state.bg_y1, state.bg_y2, damage["enemy"], damage["laser"], damage["projectile"],
+        waves.seq, waves.bosses_left, laser_x, laser_boss_x,
+        len(players), len(sprites), len(events), n, proj.emitted, words[RNG_WORDS],
+        gauss if gauss is not None else 0.0,
+    )
+    return b"".join((
+        header, players.tobytes(), sprites.tobytes(), events.tobytes(),
+        proj.x[:n].astype("<f4").tobytes(), proj.y[:n].astype("<f4").tobytes(),
+        proj.vx[:n].astype("<f4").tobytes(), proj.vy[:n].astype("<f4").tobytes(),
+        rng.tobytes(),
+    ))
+
+
+def restore_state(state, data):
+    # kembalikan snapshot ke GameState yang sudah ada (config harus sama:
+    # params, wave table, jumlah player). Partikel ledakan tidak disimpan.
+    (magic, version, frame, score, boss_stage, flags, laser_last, laser_start_time,
+     pattern_index, pattern_start, bg_y1, bg_y2, dmg_enemy, dmg_laser, dmg_projectile,
+     wave_seq, bosses_left, laser_x, laser_boss_x, n_players, n_sprites, n_events, n_proj,
+     emitted, rng_index, gauss) = SNAPSHOT_HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError("bukan snapshot Space Shooter yang dikenali")
+    if n_players != len(state.players):
+        raise ValueError(f"snapshot untuk {n_players} player, game ini {len(state.players)} player")
+
+    pos = SNAPSHOT_HEADER.size
+
+    def take(dtype, n):
+        nonlocal pos
+        arr = np.frombuffer(data, dtype=dtype, count=n, offset=pos)
+        pos += arr.nbytes
+        return arr
+
+    players = take(SNAPSHOT_PLAYER, n_players)
+    sprites = take(SNAPSHOT_SPRITE, n_sprites)
+    events = take(SNAPSHOT_EVENT, n_events)
+    proj_arrays = [take("<f4", n_proj) for _ in range(4)]
+    rng = array("I")
+    rng.frombytes(data[pos:pos + RNG_BYTES])
+    if sys.byteorder != "little":
+        rng.byteswap()
+
+    # entity lama masuk pool, lalu dibuat ulang sesuai urutan snapshot
+    for group in (state.enemies, state.bullets, state.items, state.explosions):
+        for s in group.sprites():
+            s.kill()
+    state.boss_lasers.empty()
+    state.particles.clear()
+    for grid in (state.enemy_grid, state.bullet_grid, state.item_grid, state.laser_grid):
+        grid.clear()
+
+    for p, rec in zip(state.players, players.tolist()):
+        x, y, hp, invincible, blink_timer, spread_timer, spread_mode, alive, visual = rec
+        p.rect.topleft = (x, y)
+        p.hp = hp
+        p.invincible = invincible
+        p.blink_timer = blink_timer
+        p.spread_timer = spread_timer
+        p.spread_mode = bool(spread_mode)
+        p.low_hp_warning = hp <= p.max_hp * 0.3
+        p.set_visual_state(PLAYER_VISUALS[visual])
+        if alive and not p.alive():
+            state.register(p, state.all_sprites)
+        elif not alive and p.alive():
+            p.kill()
+
+    images = state.images
+    rng_tmp = state.rng   # dipakai reset() sprite pool, state RNG di-set ulang di akhir
+    boss = None
+    for code, x, y, a, b, c in sprites.tolist():
+        kind = SNAPSHOT_KINDS[code]
+        if kind == "enemy":
+            s = state.spawn_enemy()
+            s.speed = a
+        elif kind == "bullet":
+            s = state.register(Bullet.spawn(0, 0, a), state.all_sprites, state.bullets)
+            s.speedy = b
+        elif kind == "boss":
+            s = boss = state.register(Boss(images["boss"], a), state.all_sprites, state.enemies)
+            s.max_hp = b
+            s.direction = c
+        elif kind == "item_heal":
+            s = state.register(ItemHeal.spawn(rng_tmp), state.all_sprites, state.items)
+            s.speedy = a
+        else:
+            s = state.register(Item.spawn(rng_tmp), state.all_sprites, state.items)
+            s.speed = a
+        s.rect.topleft = (x, y)
+    state.boss = boss
+
+    if flags & SNAP_LASER:
+        target = boss if flags & SNAP_LASER_ON_BOSS else None
+        if target is None:
+            # laser boss yang sudah mati tetap mengikuti posisi terakhirnya;
+            # boss pengganti ini hanya untuk laser, bukan state.boss
+            target = Boss(images["boss"], 1)
+            target.rect.centerx = laser_boss_x
+        laser = state.register(BossLaser(target), state.boss_lasers)
+        laser.rect.centerx = laser_x
+
+    state.frame = frame
+    state.score = score
+    state.boss_stage = boss_stage
+    state.game_over = bool(flags & SNAP_GAME_OVER)
+    # boss mati selalu lewat destroy_boss(); save lama bisa berisi boss_spawned
+    # tanpa boss (boss ditabrak), itu diperlakukan sebagai tidak ada boss
+    state.boss_spawned = bool(flags & SNAP_BOSS_SPAWNED) and boss is not None
+    state.laser_active = bool(flags & SNAP_LASER_ACTIVE)
+    state.laser_last = laser_last
+    state.laser_start_time = laser_start_time
+    state.pattern_index = pattern_index
+    state.pattern_start = pattern_start
+    state.bg_y1 = bg_y1
+    state.bg_y2 = bg_y2
+    state.damage_taken.update(enemy=dmg_enemy, laser=dmg_laser, projectile=dmg_projectile)
+
+    waves = state.waves
+    waves.events = [(f, seq, WAVE_EVENTS[kind]) for f, seq, kind in events.tolist()]
+    waves.seq = wave_seq
+    waves.bosses_left = bosses_left
+    waves.wave = waves.wave_for(boss_stage)
+
+    proj = state.projectiles
+    if n_proj > proj.capacity:
+        proj._allocate(n_proj)
+    for arr, saved in zip((proj.x, proj.y, proj.vx, proj.vy), proj_arrays):
+        arr[:n_proj] = saved
+    proj.count = n_proj
+    proj.emitted = emitted
+
+    state.rng.setstate((3, tuple(rng) + (rng_index,), gauss if flags & SNAP_GAUSS else None))
+    return state
+
+
+class RewindBuffer:
+    # Ring buffer snapshot dengan jumlah slot tetap (seconds * FPS / every);
+    # slot terlama ditimpa. push() tiap tick, rewind(n) mundur n snapshot.
+    # Slot = (isi, blok RNG); blok RNG yang sama dengan slot sebelumnya
+    # dipakai bersama, jadi memori per tick hanya isi snapshot.
+    def __init__(self, seconds=10, every=1):
+        self.every = every
+        self.capacity = max(1, int(seconds * FPS / every))
+        self.slots = [None] * self.capacity
+        self.head = 0        # slot yang ditulis berikutnya
+        self.size = 0
+        self.snapshot_time = 0.0
+        self.snapshots = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, state):
+        if state.frame % self.every:
+            return
+        start = time.perf_counter()
+        data = snapshot_state(state)
+        body, rng = data[:-RNG_BYTES], data[-RNG_BYTES:]
+        prev = self.slots[self.head - 1] if self.size else None
+        if prev is not None and prev[1] == rng:
+            rng = prev[1]
+        self.snapshot_time += time.perf_counter() - start
+        self.snapshots += 1
+        self.slots[self.head] = (body, rng)
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def latest(self):
+        if not self.size:
+            return None
+        body, rng = self.slots[self.head - 1]
+        return body + rng
+
+    def pop(self):
+        if not self.size:
+            return None
+        data = self.latest()
+        self.head = (self.head - 1) % self.capacity
+        self.slots[self.head] = None
+        self.size -= 1
+        return data
+
+    def rewind(self, state, steps=1):
+        # buang `steps` snapshot terbaru (snapshot tertua selalu disisakan),
+        # restore yang sekarang paling baru; False kalau history habis
+        if self.size <= 1:
+            return False
+        for _ in range(min(steps, self.size - 1)):
+            self.pop()
+        restore_state(state, self.latest())
+        return True
+
+    def clear(self):
+        self.slots = [None] * self.capacity
+        self.head = 0
+        self.size = 0
+
+    @property
+    def nbytes(self):
+        # isi snapshot + tiap blok RNG unik sekali
+        slots = [slot for slot in self.slots if slot is not None]
+        return sum(len(body) for body, _ in slots) + RNG_BYTES * len({id(rng) for _, rng in slots})
+
+    @property
+    def bytes_per_second(self):
+        # memori rata-rata per detik history
+        if not self.size:
+            return 0.0
+        return self.nbytes / self.size * FPS / self.every
+
+
+# --- Save / resume ---
+
+SAVE_FILE = "savegame.sav"
+SAVE_MAGIC = b"SPSV"
+SAVE_VERSION = 1
+SAVE_HEADER = struct.Struct("<4sHI")   # magic, version, panjang config JSON
+
+
+def save_game(state, path=SAVE_FILE):
+    # config game (seed, params, wave table, ...) + snapshot terkompresi
+    config = json.dumps({
+        "seed": state.seed,
+        "params": state.params,
+        "waves": state.waves.table,
+        "pixel_collision": state.pixel_collision,
+        "num_players": len(state.players),
+    }).encode()
+    data = SAVE_HEADER.pack(SAVE_MAGIC, SAVE_VERSION, len(config)) + config + \
+        zlib.compress(snapshot_state(state), 6)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def load_game(path=SAVE_FILE, images=None, audio=None):
+    # return GameState baru yang melanjutkan save
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, config_len = SAVE_HEADER.unpack_from(data)
+    if magic != SAVE_MAGIC or version != SAVE_VERSION:
+        raise ValueError(f"{path}: bukan file save Space Shooter yang dikenali")
+    pos = SAVE_HEADER.size
+    config = json.loads(data[pos:pos + config_len])
+    if images is None:
+        if not pygame.display.get_surface():
+            pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        images = load_images()
+    state = GameState(images, audio, seed=config["seed"], params=config["params"],
+                      waves=config["waves"], pixel_collision=config["pixel_collision"],
+                      num_players=config["num_players"])
+    return restore_state(state, zlib.decompress(data[pos + config_len:]))
 
-    explosions = pygame.sprite.Group()
 
-    # background scroll
-    bg_y1 = 0
-    bg_y2 = -SCREEN_HEIGHT
-    bg_speed = 3
+# === MAIN ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Space Shooter")
+    parser.add_argument("--dirty", action="store_true",
+                        help="renderer dirty-rect (untuk mesin yang fill-rate bound)")
+    parser.add_argument("--dirty-scroll", type=int, default=4, metavar="N",
+                        help="--dirty: geser background tiap N frame (0 = diam, redraw penuh paling jarang)")
+    parser.add_argument("--profile", action="store_true", help="tampilkan overlay profiler (F3)")
+    parser.add_argument("--profile-trace", help="tulis waktu per fase tiap frame ke .csv / .json")
+    parser.add_argument("--record", help="rekam input tiap game ke file replay")
+    parser.add_argument("--quality", default="auto",
+                        choices=["auto"] + [str(i) for i in range(len(QualityGovernor.LEVELS))],
+                        help="level grafis (0 = penuh), auto = turun/naik sesuai frame time")
+    parser.add_argument("--window", default=f"{SCREEN_WIDTH}x{SCREEN_HEIGHT}",
+                        help="ukuran window, mis. 1440x1080")
+    parser.add_argument("--render-scale", type=float, default=1.0,
+                        help="resolusi render relatif 800x600 (0.5 = setengah, 4x lebih sedikit fill)")
+    parser.add_argument("--smooth", action="store_true",
+                        help="scale ke window dengan smoothscale (default nearest/integer)")
+    parser.add_argument("--pixel-collision", action="store_true",
+                        help="collision per piksel (mask), bukan kotak rect")
+    parser.add_argument("--rewind-seconds", type=float, default=10,
+                        help="panjang history rewind (BACKSPACE), 0 = mati")
+    parser.add_argument("--resume", help="lanjutkan game dari file save (F5 menyimpan)")
+    args = parser.parse_args(argv)
+    try:
+        window_size = tuple(int(v) for v in args.window.lower().split("x"))
+    except ValueError:
+        parser.error(f"--window harus WxH, bukan {args.window}")
+    games = 0
+    auto_quality = args.quality == "auto"
+    governor = QualityGovernor(level=0 if auto_quality else int(args.quality), auto=auto_quality)
+
+    profiler = FrameProfiler(trace_path=args.profile_trace)
+    profiler.visible = args.profile
+
+    global DISPLAY
+    DISPLAY = RenderTarget(window_size, args.render_scale, args.smooth)
+    if args.dirty and not DISPLAY.direct:
+        parser.error("--dirty hanya bisa tanpa scaling (window 800x600, --render-scale 1)")
+    if args.dirty_scroll < 0:
+        parser.error("--dirty-scroll harus >= 0")
+    screen = DISPLAY.logical
+    canvas = DISPLAY.canvas
+    pygame.display.set_caption("Space Shooter - HP Bar Edition")
+    clock = pygame.time.Clock()
+    font = TEXT.sysfont(None, 36)
+    hud_font = TEXT.sysfont(None, round(36 * canvas.get_width() / SCREEN_WIDTH))
 
-    highscore = load_highscore()
+    leaderboard = Leaderboard()
     running = True
+    # snapshot tiap tick untuk rewind; checkpoint = snapshot sebelum tiap boss
+    rewind = RewindBuffer(args.rewind_seconds) if args.rewind_seconds > 0 else None
+    resume = args.resume
 
-    # show splash
+    # show splash: asset & leaderboard dimuat di thread selama splash
     splash_loading(screen)
+    images = load_images()
+    AUDIO.preload()
+    # load biasanya selesai selama splash; tunggu sebentar agar highscore awal tidak 0
+    leaderboard.ready.wait(timeout=2.0)
+    highscore = leaderboard.best()
 
     while running:
         # welcome
         result = None
-        show_result = show_welcome_screen(screen, font, highscore, menu_bg)
-
-        # Setup groups
-        all_sprites = pygame.sprite.Group()
-        enemies = pygame.sprite.Group()
-        bullets = pygame.sprite.Group()
-        items = pygame.sprite.Group()      # includes Item (spread) and ItemHeal
-        boss_lasers = pygame.sprite.Group()
-        explosions = pygame.sprite.Group()
-
-        player = Player(player_img)
-        all_sprites.add(player)
-
-        score = 0
-        item_timer = 0
-        enemy_timer = 0
-
-        boss_spawned = False
-        boss_stage = 1
-
-        laser_delay = 5000
-        laser_duration = 1500
-        laser_last = pygame.time.get_ticks()
-        laser_active = False
-        laser_start_time = 0
-
-        # spawn initial enemies
-        for _ in range(5):
-            e = Enemy(enemy_img)
-            all_sprites.add(e)
-            enemies.add(e)
+        show_result = show_welcome_screen(screen, font, highscore, images["menu_bg"])
 
+        if resume:
+            state = load_game(resume, images, AUDIO)
+            resume = None
+        else:
+            state = GameState(images, AUDIO, pixel_collision=args.pixel_collision)
+        state.profiler = profiler if profiler.active else None
+        # rekaman input hanya bisa dimulai dari frame 0 (replay mulai dari seed)
+        recording = None
+        if args.record and state.frame == 0:
+            recording = InputRecording(state.seed, pixel_collision=state.pixel_collision)
+        renderer = DirtyRenderer(screen, args.dirty_scroll) if args.dirty else None
+        if renderer:
+            renderer.attach(state)
+        governor.apply(state)
+        checkpoints = {}      # boss_stage -> snapshot
+        if rewind is not None:
+            rewind.clear()
+            rewind.push(state)
+
+        # fixed step + accumulator: simulasi selalu maju 1/FPS per step, jadi
+        # frame yang lambat dikejar dengan beberapa step (maks MAX_CATCHUP)
+        # dan kecepatan game tetap real-time, replay tetap deterministik
+        accumulator = 0.0
+        pending_fire = 0
+        jumped = False
         playing = True
+        # waktu di menu / loading bukan waktu frame: jangan masuk accumulator
+        # maupun rata-rata governor
+        clock.tick()
         while playing:
-            clock.tick(FPS)
+            accumulator = min(accumulator + clock.tick(FPS), STEP_MS * MAX_CATCHUP)
+            work_ms = clock.get_rawtime()
+            if governor.update(work_ms):
+                governor.apply(state)
+            prof = state.profiler
+            if prof:
+                prof.begin_frame()
 
             # events
-            for event in pygame.event.get():
+            events = pygame.event.get()
+            for event in events:
                 if event.type == pygame.QUIT:
                     playing = False
                     running = False
-                elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
-                    if shoot_sound:
-                        shoot_sound.play()
-                    for b in player.shoot():
-                        all_sprites.add(b)
-                        bullets.add(b)
-
-            # spawn heal item occasionally (small chance each frame)
-            if random.randint(1, 1000) == 1:
-                h = ItemHeal()
-                all_sprites.add(h)
-                items.add(h)
-
-            # spawn regular item occasionally
-            item_timer += 1
-            if item_timer > 400:
-                it = Item()
-                all_sprites.add(it)
-                items.add(it)
-                item_timer = 0
-
-            # spawn enemy small (cap)
-            enemy_timer += 1
-            if enemy_timer > 60 and len([e for e in enemies if not isinstance(e, Boss)]) < 5:
-                new_enemy = Enemy(enemy_img)
-                all_sprites.add(new_enemy)
-                enemies.add(new_enemy)
-                enemy_timer = 0
-
-            # spawn boss every multiple of 300
-            if score >= boss_stage * 300 and not boss_spawned:
-                boss_hp = 80 + (boss_stage - 1) * 25
-                boss = Boss(boss_img, boss_hp)
-                all_sprites.add(boss)
-                enemies.add(boss)
-                boss_spawned = True
-
-            # update
-            all_sprites.update()
-
-            # boss laser behaviour
-            if boss_spawned:
-                now = pygame.time.get_ticks()
-                if not laser_active and now - laser_last > laser_delay:
-                    laser = BossLaser(boss)
-                    boss_lasers.add(laser)
-                    laser_active = True
-                    laser_start_time = now
-                if laser_active and now - laser_start_time > laser_duration:
-                    boss_lasers.empty()
-                    laser_active = False
-                    laser_last = now
-
-            boss_lasers.update()
-
-            # scrolling background
-            bg_y1 += bg_speed
-            bg_y2 += bg_speed
-            if bg_y1 >= SCREEN_HEIGHT:
-                bg_y1 = -SCREEN_HEIGHT
-            if bg_y2 >= SCREEN_HEIGHT:
-                bg_y2 = -SCREEN_HEIGHT
-
-            # bullet hits
-            hits = pygame.sprite.groupcollide(enemies, bullets, False, True)
-            for enemy in hits:
-                # boss
-                if isinstance(enemy, Boss):
-                    enemy.hp -= 5
-                    if enemy.hp <= 0:
-                        # boss explosion sound
-                        if boss_explosion_sound:
-                            boss_explosion_sound.play()
-                        boom = Explosion(enemy.rect.centerx, enemy.rect.centery, boss=True)
-                        all_sprites.add(boom)
-                        explosions.add(boom)
-                        enemy.kill()
-                        score += 150
-                        boss_spawned = False
-                        boss_stage += 1
-                else:
-                    # small enemy -> small explosion
-                    small_explosion = Explosion(enemy.rect.centerx, enemy.rect.centery, boss=False)
-                    all_sprites.add(small_explosion)
-                    explosions.add(small_explosion)
-                    enemy.kill()
-                    score += 10
-                    # spawn replacement
-                    new_enemy = Enemy(enemy_img)
-                    all_sprites.add(new_enemy)
-                    enemies.add(new_enemy)
-
-            # pick up items (both spread items and heal)
-            item_hits = pygame.sprite.spritecollide(player, items, True)
-            for it in item_hits:
-                if isinstance(it, ItemHeal):
-                    player.hp += 30
-                    if player.hp > player.max_hp:
-                        player.hp = player.max_hp
-                    if heal_sound:
-                        heal_sound.play()
-                else:
-                    # regular spread item
-                    player.spread_mode = True
-                    player.spread_timer = 300
-
-            # enemy collision with player (damage)
-            hit_enemy = pygame.sprite.spritecollide(player, enemies, True)
-            if hit_enemy and player.invincible == 0:
-                # small enemy collision damage (reduce hp by 15)
-                player.hp -= 15
-                player.invincible = 40
-
-                # spawn small explosion(s) for the killed enemy(s)
-                for _ in hit_enemy:
-                    boom = Explosion(player.rect.centerx, player.rect.centery, boss=False)
-                    all_sprites.add(boom)
-                    explosions.add(boom)
-
-            # laser collision (boss laser)
-            if pygame.sprite.spritecollide(player, boss_lasers, False) and player.invincible == 0:
-                player.hp -= 30
-                player.invincible = 50
-
-            # clamp hp
-            if player.hp < 0:
-                player.hp = 0
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    profiler.visible = not profiler.visible
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F5:
+                    save_game(state, SAVE_FILE)
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F9 and os.path.exists(SAVE_FILE):
+                    # save bisa dari run lain (seed beda): mulai timeline baru
+                    state = load_game(SAVE_FILE, images, AUDIO)
+                    recording = None
+                    checkpoints.clear()
+                    jumped = True
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_c and checkpoints:
+                    # latihan: ulang dari sebelum boss terakhir
+                    restore_state(state, checkpoints[max(checkpoints)])
+                    jumped = True
+            if prof:
+                prof.mark("events")
+
+            if jumped:
+                jumped = False
+                state.profiler = profiler if profiler.active else None
+                if renderer:
+                    renderer.attach(state)
+                governor.apply(state)
+                if recording is not None:
+                    recording.truncate(state.frame)
+                if rewind is not None:
+                    rewind.clear()
+                    rewind.push(state)
+                accumulator = 0.0
+                pending_fire = 0
+                clock.tick()    # load save / restore tidak dihitung ke frame berikutnya
+
+            inputs = read_frame_input(events)
+            if rewind is not None and inputs.keys[pygame.K_BACKSPACE]:
+                # tahan BACKSPACE: mundur 2 tick per frame, simulasi berhenti
+                if rewind.rewind(state, 2) and recording is not None:
+                    recording.truncate(state.frame)
+                accumulator = 0.0
+                pending_fire = 0
+                inputs = NO_INPUT
+            pending_fire += inputs.fire
+            # jitter clock.tick (16/17 ms) dibulatkan ke step terdekat supaya
+            # tidak selang-seling 0 dan 2 step per frame
+            while accumulator >= STEP_MS / 2 and not state.game_over:
+                step_input = FrameInput(inputs.keys, min(pending_fire, 15))
+                pending_fire -= step_input.fire
+                boss_before = state.boss_spawned
+                state.step(step_input)
+                if recording is not None:
+                    recording.record(step_input, state)
+                if rewind is not None:
+                    if state.boss_spawned and not boss_before:
+                        checkpoints.setdefault(state.boss_stage, rewind.latest())
+                    rewind.push(state)
+                accumulator -= STEP_MS
 
             # game over check
-            if player.hp <= 0:
-                pygame.mixer.music.stop()
-                game_over_fx.play()
+            if state.game_over:
+                AUDIO.stop_music()
+                state.play_sound("game_over")
                 playing = False
 
             # DRAW
-            screen.blit(bg_game, (0, bg_y1))
-            screen.blit(bg_game, (0, bg_y2))
-
-            # draw all sprites (note explosion surfaces may be large)
-            # To ensure explosions drawn on top, draw normal sprites first, then explosions
-            # But all_sprites includes explosions; we can draw all_sprites, then explosions again is fine.
-            all_sprites.draw(screen)
-            boss_lasers.draw(screen)
-            explosions.draw(screen)
-
-            # draw boss hp bars (if any)
-            for enemy in enemies:
-                if isinstance(enemy, Boss):
-                    bar_w = 150
-                    fill = int(bar_w * (enemy.hp / enemy.max_hp))
-                    bar_x = enemy.rect.centerx - bar_w // 2
-                    bar_y = enemy.rect.y - 20
-                    pygame.draw.rect(screen, (60, 60, 60), (bar_x, bar_y, bar_w, 10))
-                    pygame.draw.rect(screen, (255, 0, 0), (bar_x, bar_y, fill, 10))
-
-            # HUD: score & highscore & player HP bar
-            score_text = font.render(f"Score: {score}", True, WHITE)
-            screen.blit(score_text, (10, 40))
-            hs_text = font.render(f"High Score: {highscore}", True, WHITE)
-            screen.blit(hs_text, (10, 70))
-
-            draw_player_hp(screen, player)
-
-            pygame.display.flip()
-
-        # end playing loop -> update highscore and show game over screen
-        if score > highscore:
-            highscore = score
-            save_highscore(highscore)
-
-        result = show_game_over_screen(screen, font, score, highscore)
+            if renderer:
+                rects = renderer.draw(font, highscore)
+                if profiler.visible and prof:
+                    panel = profiler.draw_overlay(screen)
+                    rects.append(panel)
+                    renderer.overlay_rects.append(panel)
+                pygame.display.update(rects)
+            else:
+                state.draw(canvas, hud_font, highscore)
+                if profiler.visible and prof:
+                    profiler.draw_overlay(canvas)
+                DISPLAY.present()
+
+            if prof:
+                prof.mark("flip")
+                prof.end_frame({
+                    "enemies": len(state.enemies),
+                    "bullets": len(state.bullets),
+                    "items": len(state.items),
+                    "lasers": len(state.boss_lasers),
+                    "explode": len(state.explosions),
+                    "particle": state.particles.count,
+                    "shots": state.projectiles.count,
+                    "quality": governor.level,
+                    "rewind_kb": rewind.nbytes // 1024 if rewind is not None else 0,
+                })
+            state.profiler = profiler if profiler.active else None
+
+        if recording is not None:
+            games += 1
+            base, ext = os.path.splitext(args.record)
+            recording.save(args.record if games == 1 else f"{base}-{games}{ext}")
+
+        # end playing loop -> simpan ke leaderboard and show game over screen
+        score = state.score
+        entry = leaderboard.submit(score, state.boss_stage, state.frame / FPS)
+        highscore = leaderboard.best()
+
+        result = show_game_over_screen(screen, font, score, highscore,
+                                       leaderboard.top(5), entry)
         if result == "quit":
             running = False
         elif result == "retry":
             continue
 
+    profiler.close()
+    leaderboard.close()
+    AUDIO.close()
     pygame.quit()
 
+
+def main_headless(argv):
+    parser = argparse.ArgumentParser(description="Jalankan simulasi Space Shooter tanpa window")
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--frames", type=int, default=6000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--record", help="simpan rekaman input run ini")
+    parser.add_argument("--replay", help="putar ulang file rekaman (uncapped)")
+    parser.add_argument("--no-verify", action="store_true", help="replay tanpa cek hash per frame")
+    parser.add_argument("--pixel-collision", action="store_true", help="collision per piksel (mask)")
+    parser.add_argument("--resume", help="lanjutkan dari file save, --frames tick lagi")
+    parser.add_argument("--save", help="simpan state akhir ke file save")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.replay:
+        state = play_replay(InputRecording.load(args.replay), verify=not args.no_verify)
+    elif args.resume:
+        state = run_headless(args.frames, state=load_game(args.resume))
+    else:
+        recording = None
+        state = None
+        if args.record or args.pixel_collision:
+            pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            state = GameState(load_images(), seed=args.seed, pixel_collision=args.pixel_collision)
+        if args.record:
+            recording = InputRecording(state.seed, pixel_collision=args.pixel_collision)
+        state = run_headless(args.frames, seed=args.seed, state=state, recording=recording)
+        if recording is not None:
+            recording.save(args.record)
+    elapsed = time.perf_counter() - start
+    if args.save:
+        save_game(state, args.save)
+    print(f"{state.frame} frames in {elapsed:.2f}s ({state.frame / max(elapsed, 1e-9):.0f} fps), "
+          f"score={state.score}, hp={state.player.hp}")
+    pygame.quit()
+
+
 if __name__ == "__main__":
-    main()
+    if HEADLESS:
+        main_headless(sys.argv[1:])
+    else:
+        main(sys.argv[1:])
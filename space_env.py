@@ -0,0 +1,251 @@
+# Environment ala Gym untuk agent otomatis: reset(seed) / step(action)
+# dengan action diskrit (8 arah + diam, x tembak/tidak), observasi berupa
+# array fitur NumPy (posisi & kecepatan semua entitas) dan opsional piksel
+# yang di-downscale. SpaceVecEnv menjalankan N game sekaligus dengan
+# frame-skip, tanpa clock.tick dan tanpa window.
+#
+#   env = SpaceVecEnv(8, frame_skip=4)
+#   obs, info = env.reset(seed=0)
+#   obs, reward, terminated, truncated, info = env.step(actions)
+import os
+import random
+
+os.environ["SPACE_HEADLESS"] = "1"
+
+import numpy as np
+import pygame
+import space
+
+K = pygame
+# (tombol yang ditahan, tembak?) per action
+MOVES = (
+    (),
+    (K.K_UP,), (K.K_DOWN,), (K.K_LEFT,), (K.K_RIGHT,),
+    (K.K_UP, K.K_LEFT), (K.K_UP, K.K_RIGHT), (K.K_DOWN, K.K_LEFT), (K.K_DOWN, K.K_RIGHT),
+)
+ACTIONS = [space.FrameInput(space.KeyState(keys), fire) for fire in (0, 1) for keys in MOVES]
+# fire hanya di tick pertama frame-skip (1 tekan SPACE = 1 tembakan)
+_HOLD = [space.FrameInput(a.keys, 0) for a in ACTIONS]
+
+# jumlah slot tetap per jenis entitas di vektor observasi
+MAX_ENEMIES = 8
+MAX_BULLETS = 32
+MAX_ITEMS = 4
+MAX_SHOTS = 16     # peluru boss terdekat ke player
+
+# (nama, jumlah slot, fitur per slot)
+OBS_LAYOUT = (
+    ("player", 1, 6),    # x, y, hp, invincible, spread_timer, spread_mode
+    ("enemies", MAX_ENEMIES, 5),   # present, x, y, vx, vy
+    ("bullets", MAX_BULLETS, 5),   # present, x, y, vx, vy
+    ("items", MAX_ITEMS, 5),       # present, x, y, vy, heal?
+    ("boss", 1, 6),      # present, x, y, vx, vy, hp
+    ("laser", 1, 3),     # present, x, laser_active
+    ("shots", MAX_SHOTS, 5),       # present, dx, dy (relatif player), vx, vy
+)
+OBS_SLICES = {}
+_offset = 0
+for _name, _slots, _feats in OBS_LAYOUT:
+    OBS_SLICES[_name] = slice(_offset, _offset + _slots * _feats)
+    _offset += _slots * _feats
+OBS_SIZE = _offset
+
+W = float(space.SCREEN_WIDTH)
+H = float(space.SCREEN_HEIGHT)
+
+
+def _ensure_display():
+    if not pygame.display.get_surface():
+        pygame.display.set_mode((space.SCREEN_WIDTH, space.SCREEN_HEIGHT))
+
+
+def write_features(state, out):
+    # isi vektor observasi state ke `out` (float32, panjang OBS_SIZE)
+    out[:] = 0.0
+    p = state.player
+    out[OBS_SLICES["player"]] = (
+        p.rect.centerx / W, p.rect.centery / H, p.hp / p.max_hp,
+        p.invincible / 50.0, p.spread_timer / 300.0, float(p.spread_mode),
+    )
+
+    view = out[OBS_SLICES["enemies"]].reshape(MAX_ENEMIES, 5)
+    i = 0
+    for e in state.enemies:
+        if e is state.boss or i >= MAX_ENEMIES:
+            continue
+        view[i] = (1.0, e.rect.centerx / W, e.rect.centery / H, 0.0, e.speed / 10.0)
+        i += 1
+
+    view = out[OBS_SLICES["bullets"]].reshape(MAX_BULLETS, 5)
+    for i, b in enumerate(state.bullets):
+        if i >= MAX_BULLETS:
+            break
+        view[i] = (1.0, b.rect.centerx / W, b.rect.centery / H, b.speedx / 10.0, b.speedy / 10.0)
+
+    view = out[OBS_SLICES["items"]].reshape(MAX_ITEMS, 5)
+    for i, it in enumerate(state.items):
+        if i >= MAX_ITEMS:
+            break
+        heal = it.KIND == "item_heal"
+        vy = it.speedy if heal else it.speed
+        view[i] = (1.0, it.rect.centerx / W, it.rect.centery / H, vy / 10.0, float(heal))
+
+    boss = state.boss
+    if state.boss_spawned and boss is not None:
+        descending = boss.rect.top < 20
+        out[OBS_SLICES["boss"]] = (
+            1.0, boss.rect.centerx / W, boss.rect.centery / H,
+            0.0 if descending else boss.speed * boss.direction / 10.0,
+            0.2 if descending else 0.0, boss.hp / boss.max_hp,
+        )
+
+    for laser in state.boss_lasers:
+        out[OBS_SLICES["laser"]] = (1.0, laser.rect.centerx / W, float(state.laser_active))
+        break
+
+    proj = state.projectiles
+    n = proj.count
+    if n:
+        dx = proj.x[:n] - p.rect.centerx
+        dy = proj.y[:n] - p.rect.centery
+        dist = dx * dx + dy * dy
+        k = min(n, MAX_SHOTS)
+        idx = np.argpartition(dist, k - 1)[:k] if n > k else np.arange(n)
+        idx = idx[np.argsort(dist[idx])]
+        view = out[OBS_SLICES["shots"]].reshape(MAX_SHOTS, 5)
+        view[:k, 0] = 1.0
+        view[:k, 1] = dx[idx] / W
+        view[:k, 2] = dy[idx] / H
+        view[:k, 3] = proj.vx[idx] / 10.0
+        view[:k, 4] = proj.vy[idx] / 10.0
+    return out
+
+
+class SpaceEnv:
+    # Satu game. reward = skor yang didapat / 10 - HP yang hilang / 10
+    n_actions = len(ACTIONS)
+    obs_size = OBS_SIZE
+
+    def __init__(self, frame_skip=4, max_steps=None, pixels=False, pixel_size=(84, 84),
+                 params=None):
+        _ensure_display()
+        self.images = space.load_images()
+        self.frame_skip = frame_skip
+        self.max_steps = max_steps
+        self.pixels = pixels
+        self.pixel_size = pixel_size
+        self.params = params
+        # seed game berikutnya (auto-reset SpaceVecEnv) diambil dari sini,
+        # di-seed ulang oleh reset(seed) supaya seluruh run bisa diulang
+        self.seeds = random.Random()
+        self.state = None
+        self.steps = 0
+        self._canvas = None
+        self._small = None
+        self._font = None
+
+    def reset(self, seed=None):
+        self._new_game(seed)
+        return self._observation(), self._info()
+
+    def _new_game(self, seed=None):
+        if seed is None:
+            seed = self.seeds.randrange(2 ** 32)
+        else:
+            self.seeds.seed(seed)
+        self.state = space.GameState(self.images, seed=seed, params=self.params)
+        self.steps = 0
+
+    def step(self, action):
+        reward, terminated, truncated = self._advance(action)
+        return self._observation(), reward, terminated, truncated, self._info()
+
+    def _advance(self, action):
+        # jalankan frame_skip tick dengan action yang sama
+        state = self.state
+        score = state.score
+        hp = state.player.hp
+
+        state.step(ACTIONS[action])
+        for _ in range(self.frame_skip - 1):
+            if state.game_over:
+                break
+            state.step(_HOLD[action])
+        self.steps += 1
+
+        reward = (state.score - score) / 10.0 - max(hp - state.player.hp, 0) / 10.0
+        terminated = state.game_over
+        truncated = self.max_steps is not None and self.steps >= self.max_steps and not terminated
+        return reward, terminated, truncated
+
+    def _info(self):
+        state = self.state
+        return {"frame": state.frame, "score": state.score, "hp": state.player.hp,
+                "boss_stage": state.boss_stage}
+
+    def _observation(self, out=None):
+        if out is None:
+            out = np.empty(OBS_SIZE, dtype=np.float32)
+        write_features(self.state, out)
+        if self.pixels:
+            return {"features": out, "pixels": self.render_pixels()}
+        return out
+
+    def render_pixels(self):
+        # render ke canvas offscreen lalu downscale, return uint8 (h, w, 3)
+        if self._canvas is None:
+            self._canvas = pygame.Surface((space.SCREEN_WIDTH, space.SCREEN_HEIGHT)).convert()
+            self._small = pygame.Surface(self.pixel_size).convert()
+            self._font = space.TEXT.sysfont(None, 36)
+        self.state.draw(self._canvas, self._font, 0)
+        pygame.transform.smoothscale(self._canvas, self.pixel_size, self._small)
+        return pygame.surfarray.array3d(self._small).transpose(1, 0, 2)
+
+
+class SpaceVecEnv:
+    # N SpaceEnv dalam satu proses. Observasi fitur ditulis langsung ke satu
+    # buffer (N, OBS_SIZE) tanpa alokasi per env; env yang selesai di-reset
+    # otomatis dan observasi terakhirnya ada di info["final_observation"].
+    def __init__(self, num_envs, frame_skip=4, max_steps=None, pixels=False,
+                 pixel_size=(84, 84), params=None):
+        self.num_envs = num_envs
+        self.envs = [SpaceEnv(frame_skip, max_steps, pixels, pixel_size, params)
+                     for _ in range(num_envs)]
+        self.pixels = pixels
+        self.n_actions = SpaceEnv.n_actions
+        self.obs_size = OBS_SIZE
+        self.obs = np.zeros((num_envs, OBS_SIZE), dtype=np.float32)
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.terminated = np.zeros(num_envs, dtype=bool)
+        self.truncated = np.zeros(num_envs, dtype=bool)
+
+    def _batch(self):
+        if not self.pixels:
+            return self.obs
+        return {"features": self.obs,
+                "pixels": np.stack([env.render_pixels() for env in self.envs])}
+
+    def reset(self, seed=None):
+        infos = []
+        for i, env in enumerate(self.envs):
+            env._new_game(None if seed is None else seed + i)
+            write_features(env.state, self.obs[i])
+            infos.append(env._info())
+        return self._batch(), infos
+
+    def step(self, actions):
+        infos = []
+        for i, (env, action) in enumerate(zip(self.envs, actions)):
+            reward, terminated, truncated = env._advance(int(action))
+            info = env._info()
+            self.rewards[i] = reward
+            self.terminated[i] = terminated
+            self.truncated[i] = truncated
+            if terminated or truncated:
+                final = np.empty(OBS_SIZE, dtype=np.float32)
+                info["final_observation"] = write_features(env.state, final)
+                info["final_info"] = dict(info)
+                env._new_game()
+            write_features(env.state, self.obs[i])
+            infos.append(info)
+        return self._batch(), self.rewards.copy(), self.terminated.copy(), self.truncated.copy(), infos
@@ -0,0 +1,66 @@
+import os
+
+os.environ.setdefault("SPACE_HEADLESS", "1")
+
+import pygame
+
+import space
+
+pygame.display.set_mode((space.SCREEN_WIDTH, space.SCREEN_HEIGHT))
+IMAGES = space.load_images()
+
+
+def ram_boss(state):
+    # tunggu boss selesai turun (pola tembakan aktif), lalu tabrak
+    boss = state.spawn_boss()
+    while boss.rect.top < 20:
+        state.player.hp = state.player.max_hp
+        state.step()
+    state.player.invincible = 0
+    state.player.rect.center = boss.rect.center
+    state.step()
+    return boss
+
+
+def test_rammed_boss_is_destroyed():
+    state = space.GameState(IMAGES, seed=3)
+    boss = ram_boss(state)
+    assert not boss.alive()
+    assert state.boss is None and not state.boss_spawned
+
+    # boss yang sudah mati tidak menembak lagi
+    emitted = state.projectiles.emitted
+    for _ in range(600):
+        state.player.hp = state.player.max_hp
+        state.step()
+    assert state.projectiles.emitted == emitted
+
+
+def test_dead_boss_does_not_fire_patterns():
+    # boss yang hilang di luar destroy_boss() (mis. kill langsung) tetap diam
+    state = space.GameState(IMAGES, seed=3)
+    boss = state.spawn_boss()
+    while boss.rect.top < 20:
+        state.player.hp = state.player.max_hp
+        state.step()
+    boss.kill()
+    emitted = state.projectiles.emitted
+    for _ in range(300):
+        state.player.hp = state.player.max_hp
+        state.step()
+    assert state.projectiles.emitted == emitted
+
+
+def test_snapshot_round_trip_after_ramming_boss():
+    state = space.GameState(IMAGES, seed=3)
+    ram_boss(state)
+    data = space.snapshot_state(state)
+
+    restored = space.GameState(IMAGES, seed=99)
+    space.restore_state(restored, data)
+    assert space.snapshot_state(restored) == data
+    for _ in range(600):
+        for s in (state, restored):
+            s.player.hp = s.player.max_hp
+            s.step()
+        assert space.state_hash(restored) == space.state_hash(state)
@@ -0,0 +1,22 @@
+import random
+
+import numpy as np
+
+import space_env
+
+
+def run_vec_env(global_seed):
+    # global random berbeda: hasil harus tetap sama karena reset(seed) dipakai
+    random.seed(global_seed)
+    env = space_env.SpaceVecEnv(2, frame_skip=4, max_steps=25)
+    env.reset(seed=5)
+    actions = np.random.default_rng(0)
+    frames = []
+    for _ in range(120):
+        obs, _, _, _, _ = env.step(actions.integers(0, env.n_actions, env.num_envs))
+        frames.append(obs.copy())
+    return np.stack(frames)
+
+
+def test_vec_env_auto_reset_is_reproducible():
+    assert np.array_equal(run_vec_env(1), run_vec_env(2))